@@ -0,0 +1,51 @@
+from typing import List, Tuple
+
+
+def choose_k(distances: List[float],
+             min_k: int,
+             max_k: int,
+             gap_ratio: float,
+             cumulative_threshold: float) -> Tuple[int, str]:
+    """Pick how many candidates to keep from distances sorted ascending
+
+    Two cut-offs are computed and the smaller one wins, clamped to
+    [min_k, max_k]:
+
+    - score gap: stop before the first jump between neighbours larger than
+      ``gap_ratio`` of the pool's total distance spread;
+    - cumulative relevance: relevance is ``max_distance - distance``, and we
+      stop once the kept candidates hold ``cumulative_threshold`` of it.
+
+    Returns (k, reason).
+    """
+    count = len(distances)
+    if count == 0:
+        return 0, "empty"
+    max_k = min(max_k, count)
+    min_k = min(min_k, max_k)
+
+    spread = distances[-1] - distances[0]
+    if spread <= 0:
+        return max_k, "flat"
+
+    gap_k = count
+    for i in range(1, count):
+        if distances[i] - distances[i - 1] >= gap_ratio * spread:
+            gap_k = i
+            break
+
+    relevance = [distances[-1] - distance for distance in distances]
+    total = sum(relevance)
+    cumulative_k = count
+    running = 0.0
+    for i, value in enumerate(relevance, 1):
+        running += value
+        if running >= cumulative_threshold * total:
+            cumulative_k = i
+            break
+
+    if gap_k <= cumulative_k:
+        k, reason = gap_k, "score_gap"
+    else:
+        k, reason = cumulative_k, "cumulative"
+    return max(min_k, min(max_k, k)), reason
@@ -0,0 +1,180 @@
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Set, Tuple
+from config import Config
+
+# Fields tried, in order, when a JSONL line does not name its question/id field
+QUESTION_FIELDS = ("question", "query", "body", "title")
+ID_FIELDS = ("id", "request_id", "query_id")
+
+
+def iter_questions(path: str, question_field: str = None) -> Iterator[Tuple[str, str]]:
+    """Stream (id, question) pairs from a JSON Lines file
+
+    Lines without an id field are keyed by line number so resumes stay stable.
+    Malformed lines are logged and skipped rather than aborting the run.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"⚠️  Skipping line {line_number}: invalid JSON ({e})")
+                continue
+            if isinstance(record, str):
+                yield f"line-{line_number}", record
+                continue
+            if not isinstance(record, dict):
+                print(f"⚠️  Skipping line {line_number}: expected an object or a string")
+                continue
+            fields = (question_field,) if question_field else QUESTION_FIELDS
+            question = next((record[field] for field in fields if record.get(field)), None)
+            if question is None:
+                print(f"⚠️  Skipping line {line_number}: no question field")
+                continue
+            query_id = next((record[field] for field in ID_FIELDS if field in record), f"line-{line_number}")
+            yield str(query_id), question
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """Ids already answered in an output file, after dropping a torn last line"""
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path, "rb+") as file:
+        data = file.read()
+        if data and not data.endswith(b"\n"):
+            # A crash mid-write leaves a partial line; cut back to the last full one
+            file.truncate(data.rfind(b"\n") + 1)
+            data = data[:data.rfind(b"\n") + 1]
+    done = set()
+    for record in _iter_records(data.decode("utf-8", errors="replace").splitlines()):
+        if "error" not in record:
+            done.add(record["id"])
+    return done
+
+
+def _iter_records(lines: List[str]) -> Iterator[Dict[str, Any]]:
+    """Decoded output records; corrupt lines are skipped so one bad row cannot block a resume"""
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            print(f"⚠️  Ignoring unreadable output line {line_number}")
+            continue
+        if isinstance(record, dict) and "id" in record:
+            yield record
+
+
+def compact_output(output_path: str) -> int:
+    """Drop error rows superseded by a later retry, keeping one row per id
+
+    An id keeps its first answer, or its latest error if it never succeeded.
+    The file is rewritten only when something is dropped; returns the number
+    of rows removed.
+    """
+    if not os.path.exists(output_path):
+        return 0
+    with open(output_path, "r", encoding="utf-8", errors="replace") as file:
+        lines = file.read().splitlines()
+    records = list(_iter_records(lines))
+    keep = {}
+    for position, record in enumerate(records):
+        kept = keep.get(record["id"])
+        # Once an id has an answer, later rows for it are duplicates
+        if kept is None or "error" in records[kept]:
+            keep[record["id"]] = position
+    dropped = sum(1 for line in lines if line.strip()) - len(keep)
+    if dropped == 0:
+        return 0
+    temp_path = f"{output_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        for position in sorted(keep.values()):
+            file.write(json.dumps(records[position], ensure_ascii=False) + "\n")
+    os.replace(temp_path, output_path)
+    return dropped
+
+
+def source_sections(result: Dict[str, Any]) -> List[Any]:
+    """Distinct section ids of the source documents, in retrieval order"""
+    sections = []
+    for doc in result.get("source_documents", []):
+        section = doc["metadata"].get("section")
+        if section is not None and section not in sections:
+            sections.append(section)
+    return sections
+
+
+class BulkQueryRunner:
+    """Answer a JSONL file of questions with bounded concurrency, streaming JSONL results
+
+    Every finished question is appended and flushed to the output file, which
+    doubles as the checkpoint: re-running skips ids already answered and
+    retries the ones that failed.
+    """
+
+    def __init__(self, query_fn: Callable[[str], Dict[str, Any]], concurrency: int = None):
+        self.query_fn = query_fn
+        self.concurrency = concurrency or Config.BULK_QUERY_CONCURRENCY
+
+    def _answer(self, query_id: str, question: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        record = {"id": query_id, "question": question}
+        try:
+            result = self.query_fn(question)
+            record["answer"] = result["answer"]
+            record["source_sections"] = source_sections(result)
+            record["timings"] = result.get("timings", {})
+            if "retrieval" in result:
+                record["retrieval"] = result["retrieval"]
+        except Exception as e:
+            record["error"] = str(e)
+        record.setdefault("timings", {})["wall_seconds"] = round(time.perf_counter() - start, 4)
+        return record
+
+    def run(self, queries_path: str, output_path: str, question_field: str = None) -> Dict[str, Any]:
+        """Process every question not yet in the output file and return run counters"""
+        done = completed_ids(output_path)
+        if done:
+            print(f"⏩ Resuming: {len(done)} questions already answered in {output_path}")
+        stats = {"answered": 0, "failed": 0, "skipped": 0}
+        start = time.perf_counter()
+
+        with open(output_path, "a", encoding="utf-8") as output, \
+                ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="bulk-query") as executor:
+            pending = set()
+
+            def drain(block_until: int):
+                # Write finished results until at most ``block_until`` are in flight
+                nonlocal pending
+                while len(pending) > block_until:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        record = future.result()
+                        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                        output.flush()
+                        stats["failed" if "error" in record else "answered"] += 1
+
+            for query_id, question in iter_questions(queries_path, question_field):
+                if query_id in done:
+                    stats["skipped"] += 1
+                    continue
+                # Bounded in-flight work keeps memory flat however long the input is
+                drain(self.concurrency * 2 - 1)
+                pending.add(executor.submit(self._answer, query_id, question))
+            drain(0)
+
+        # Retried ids otherwise keep their old error row next to the new answer
+        dropped = compact_output(output_path)
+        if dropped:
+            print(f"🧹 Compacted {output_path}: dropped {dropped} superseded or unreadable rows")
+        stats["wall_seconds"] = round(time.perf_counter() - start, 3)
+        print(f"📦 Bulk run: {stats['answered']} answered, {stats['failed']} failed, "
+              f"{stats['skipped']} skipped in {stats['wall_seconds']:.2f}s -> {output_path}")
+        return stats
@@ -0,0 +1,241 @@
+import bisect
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, Tuple
+from langchain.schema import Document
+
+
+class TextArena:
+    """Append-only text buffer addressed by (offset, length) spans
+
+    Appended text is sealed into segments on the first read after a write.
+    A new segment is merged into the one before it while that one is no
+    larger, so segment sizes stay geometric: a few large strings, and each
+    character is copied O(log n) times however appends and reads interleave.
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._segments: List[str] = []
+        self._starts: List[int] = []
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def num_segments(self) -> int:
+        return len(self._segments)
+
+    def append(self, text: str) -> int:
+        """Append text and return its offset in the arena"""
+        offset = self._length
+        self._parts.append(text)
+        self._length += len(text)
+        return offset
+
+    def _compact(self):
+        # Join pending parts once instead of keeping one str object per record
+        if not self._parts:
+            return
+        start = self._starts[-1] + len(self._segments[-1]) if self._segments else 0
+        segment = "".join(self._parts)
+        self._parts = []
+        while self._segments and len(self._segments[-1]) <= len(segment):
+            segment = self._segments.pop() + segment
+            start = self._starts.pop()
+        self._segments.append(segment)
+        self._starts.append(start)
+
+    def slice(self, offset: int, length: int) -> str:
+        """Return the text stored at the given span"""
+        self._compact()
+        index = bisect.bisect_right(self._starts, offset) - 1
+        if index < 0:
+            return ""
+        position = offset - self._starts[index]
+        text = self._segments[index][position:position + length]
+        # A span never crosses an append, but tolerate one crossing a segment boundary
+        while len(text) < length and index + 1 < len(self._segments):
+            index += 1
+            text += self._segments[index][:length - len(text)]
+        return text
+
+
+class MetadataInterner:
+    """Store metadata as shared key schemas plus tuples of interned values"""
+
+    def __init__(self):
+        self._schema_ids: Dict[Tuple[str, ...], int] = {}
+        self._schemas: List[Tuple[str, ...]] = []
+
+    @staticmethod
+    def _intern_value(value: Any) -> Any:
+        return sys.intern(value) if isinstance(value, str) else value
+
+    def intern(self, metadata: Dict[str, Any]) -> Tuple[int, Tuple[Any, ...]]:
+        """Return (schema_id, values) for a metadata dict"""
+        keys = tuple(sys.intern(key) for key in metadata)
+        schema_id = self._schema_ids.get(keys)
+        if schema_id is None:
+            schema_id = len(self._schemas)
+            self._schema_ids[keys] = schema_id
+            self._schemas.append(keys)
+
+        values = tuple(self._intern_value(value) for value in metadata.values())
+        return schema_id, values
+
+    @property
+    def num_schemas(self) -> int:
+        return len(self._schemas)
+
+    def build(self, schema_id: int, values: Tuple[Any, ...]) -> Dict[str, Any]:
+        """Rebuild a metadata dict"""
+        return dict(zip(self._schemas[schema_id], values))
+
+
+class ChunkRecord:
+    """Lightweight view of one chunk in a ChunkStore"""
+
+    __slots__ = ("offset", "length", "doc_id")
+
+    def __init__(self, offset: int, length: int, doc_id: int):
+        self.offset = offset
+        self.length = length
+        self.doc_id = doc_id
+
+    def __repr__(self) -> str:
+        return f"ChunkRecord(offset={self.offset}, length={self.length}, doc_id={self.doc_id})"
+
+
+class ChunkStore:
+    """Compact document and chunk storage for the ingestion pipeline
+
+    Record text lives in a single TextArena, chunks are array-backed
+    (offset, length, doc_id) spans into it, and metadata is interned.
+    LangChain Documents are only built when iterating for the vector store.
+    """
+
+    def __init__(self):
+        self.arena = TextArena()
+        self.metadata = MetadataInterner()
+
+        # Per-document records
+        self._doc_offsets = array("q")
+        self._doc_lengths = array("q")
+        self._doc_schemas = array("l")
+        self._doc_values: List[Tuple[Any, ...]] = []
+
+        # Per-chunk records
+        self._chunk_offsets = array("q")
+        self._chunk_lengths = array("q")
+        self._chunk_doc_ids = array("l")
+        self._split = False
+
+    @property
+    def num_documents(self) -> int:
+        return len(self._doc_offsets)
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self._chunk_offsets)
+
+    @property
+    def is_split(self) -> bool:
+        return self._split
+
+    def add_document(self, text: str, metadata: Dict[str, Any]) -> int:
+        """Add a document and return its doc_id"""
+        doc_id = len(self._doc_offsets)
+        self._doc_offsets.append(self.arena.append(text))
+        self._doc_lengths.append(len(text))
+        schema_id, values = self.metadata.intern(metadata)
+        self._doc_schemas.append(schema_id)
+        self._doc_values.append(values)
+        return doc_id
+
+    def document_text(self, doc_id: int) -> str:
+        return self.arena.slice(self._doc_offsets[doc_id], self._doc_lengths[doc_id])
+
+    def document_metadata(self, doc_id: int) -> Dict[str, Any]:
+        return self.metadata.build(self._doc_schemas[doc_id], self._doc_values[doc_id])
+
+    def split(self, text_splitter) -> int:
+        """Split every document into chunk spans using a LangChain text splitter
+
+        Chunk strings returned by the splitter are located in the source text
+        and only their spans are kept. Returns the number of chunks.
+        """
+        self._chunk_offsets = array("q")
+        self._chunk_lengths = array("q")
+        self._chunk_doc_ids = array("l")
+
+        for doc_id in range(self.num_documents):
+            base = self._doc_offsets[doc_id]
+            text = self.document_text(doc_id)
+            search_from = 0
+            for chunk in text_splitter.split_text(text):
+                position = text.find(chunk, search_from)
+                if position < 0:
+                    position = text.find(chunk)
+                if position < 0:
+                    # Splitter rewrote the text; store the chunk itself
+                    offset = self.arena.append(chunk)
+                else:
+                    offset = base + position
+                    search_from = position + 1
+                self._chunk_offsets.append(offset)
+                self._chunk_lengths.append(len(chunk))
+                self._chunk_doc_ids.append(doc_id)
+
+        self._split = True
+        return self.num_chunks
+
+    def chunk(self, index: int) -> ChunkRecord:
+        return ChunkRecord(
+            self._chunk_offsets[index],
+            self._chunk_lengths[index],
+            self._chunk_doc_ids[index]
+        )
+
+    def chunk_text(self, index: int) -> str:
+        return self.arena.slice(self._chunk_offsets[index], self._chunk_lengths[index])
+
+    def chunk_document(self, index: int) -> Document:
+        """Build the LangChain Document for one chunk"""
+        return Document(
+            page_content=self.chunk_text(index),
+            metadata=self.document_metadata(self._chunk_doc_ids[index])
+        )
+
+    def iter_documents(self, chunks: bool = True) -> Iterator[Document]:
+        """Lazily yield Documents for chunks (or whole documents if chunks=False)"""
+        if chunks:
+            for index in range(self.num_chunks):
+                yield self.chunk_document(index)
+        else:
+            for doc_id in range(self.num_documents):
+                yield Document(
+                    page_content=self.document_text(doc_id),
+                    metadata=self.document_metadata(doc_id)
+                )
+
+    def iter_batches(self, batch_size: int = 100) -> Iterator[List[Document]]:
+        """Yield chunk Documents in batches for the vector store"""
+        batch: List[Document] = []
+        for document in self.iter_documents():
+            batch.append(document)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size information about the store"""
+        return {
+            "documents": self.num_documents,
+            "chunks": self.num_chunks,
+            "arena_chars": len(self.arena),
+            "metadata_schemas": self.metadata.num_schemas,
+        }
@@ -9,12 +9,27 @@ class Config:
     
     # Google API Configuration
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+    # Optional endpoint override (e.g. a local fake server for resilience testing)
+    GOOGLE_API_ENDPOINT = os.getenv("GOOGLE_API_ENDPOINT")
     
     # ChromaDB Configuration
     CHROMADB_HOST = os.getenv("CHROMADB_HOST", "localhost")
     CHROMADB_PORT = int(os.getenv("CHROMADB_PORT", "8000"))
     CHROMADB_COLLECTION_NAME = "documents"
     
+    # Sharding Configuration (one collection per act)
+    SHARDING_ENABLED = os.getenv("SHARDING_ENABLED", "false").lower() == "true"
+    SHARD_TITLES_FILES = [path for path in os.getenv("SHARD_TITLES_FILES", "").split(",") if path]
+    SHARD_MAX_FANOUT = 3
+    SHARD_ROUTER_MIN_SCORE_RATIO = 0.5
+    
+    # HNSW Index Configuration (applied when a collection is created; see rebuild_collections)
+    # "l2" matches collections created before these settings existed; "cosine" suits Gemini embeddings
+    HNSW_SPACE = os.getenv("HNSW_SPACE", "l2")
+    HNSW_M = int(os.getenv("HNSW_M", "16"))
+    HNSW_CONSTRUCTION_EF = int(os.getenv("HNSW_CONSTRUCTION_EF", "100"))
+    HNSW_SEARCH_EF = int(os.getenv("HNSW_SEARCH_EF", "10"))
+    
     # Embedding Configuration
     EMBEDDING_MODEL = "models/embedding-001"
     
@@ -23,13 +38,86 @@ class Config:
     LLM_TEMPERATURE = 0.1
     LLM_MAX_OUTPUT_TOKENS = 1000
     
+    # Startup Configuration
+    LAZY_INIT = os.getenv("LAZY_INIT", "true").lower() == "true"
+    WARM_UP = os.getenv("WARM_UP", "false").lower() == "true"
+    
     # Chunk Configuration
     CHUNK_SIZE = 1000
     CHUNK_OVERLAP = 200
+    INGEST_BATCH_SIZE = 100
+    
+    # Pipelined Ingestion Configuration (parse -> split -> embed -> write)
+    PIPELINE_SPLIT_WORKERS = 2
+    PIPELINE_EMBED_WORKERS = 4
+    PIPELINE_WRITE_WORKERS = 1
+    PIPELINE_QUEUE_SIZE = 256
+    PIPELINE_BATCH_LINGER = 0.05
     
     # Retrieval Configuration
     TOP_K_RESULTS = 5
     SIMILARITY_THRESHOLD = 0.7
+    # Filtered searches matching at most this many chunks are scored exactly
+    FILTER_EXACT_SEARCH_LIMIT = 2000
+    
+    # Adaptive Retrieval Configuration (k chosen per query from the score distribution)
+    ADAPTIVE_RETRIEVAL = os.getenv("ADAPTIVE_RETRIEVAL", "false").lower() == "true"
+    ADAPTIVE_CANDIDATE_POOL = 10
+    ADAPTIVE_MIN_K = 1
+    ADAPTIVE_MAX_K = TOP_K_RESULTS
+    ADAPTIVE_SCORE_GAP_RATIO = 0.3
+    ADAPTIVE_CUMULATIVE_RELEVANCE = 0.9
+    
+    # Vector Index Configuration: "hnsw" (Chroma's own index) or "ivf" (clustered, for very large corpora)
+    # "ivf" is an extra in-process index, not a replacement: Chroma cannot skip HNSW
+    # maintenance, so inserts still pay for HNSW and memory grows by a float32 copy of
+    # every vector. Choose it for faster or tunable search, not to save memory or insert time
+    VECTOR_INDEX = os.getenv("VECTOR_INDEX", "hnsw").lower()
+    IVF_LISTS = int(os.getenv("IVF_LISTS", "256"))
+    IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))
+    IVF_TRAIN_SAMPLE = 50000
+    IVF_KMEANS_ITERATIONS = 20
+    # Train once there are this many vectors per list
+    IVF_MIN_TRAIN_PER_LIST = 39
+    # Re-cluster when the index grows this much since training, or on skew/tombstones
+    IVF_RECLUSTER_GROWTH = 2.0
+    IVF_RECLUSTER_IMBALANCE = 8.0
+    IVF_RECLUSTER_DELETED_RATIO = 0.2
+    
+    # Memory-mapped Serving Configuration (read-only workers sharing one index)
+    MMAP_INDEX_DIR = os.getenv("MMAP_INDEX_DIR", "./mmap_index")
+    MMAP_KEEP_GENERATIONS = 2
+    MMAP_REFRESH_INTERVAL = 1.0
+    MMAP_SEARCH_BLOCK_ROWS = 65536
+    MMAP_EXPORT_BATCH_SIZE = 1000
+    SERVING_WORKERS = int(os.getenv("SERVING_WORKERS", "4"))
+    # "spawn" or "forkserver"; plain fork is unsafe once client threads are running
+    SERVING_START_METHOD = os.getenv("SERVING_START_METHOD", "spawn")
+    
+    # Bulk Query Configuration (--queries-file)
+    BULK_QUERY_CONCURRENCY = 4
+    
+    # Chat Session Configuration (multi-turn queries)
+    SESSION_MAX_SESSIONS = 1000
+    SESSION_TTL_SECONDS = 3600
+    SESSION_HISTORY_TOKENS = 1000
+    SESSION_SUMMARY_TOKENS = 300
+    # Most recently retrieved sections listed in the prompt
+    SESSION_MAX_SECTIONS = 20
+    # Longer questions always get a fresh retrieval
+    SESSION_FOLLOW_UP_MAX_WORDS = 8
+    
+    # Resilience Configuration (Gemini LLM and embedding calls)
+    RESILIENCE_ENABLED = os.getenv("RESILIENCE_ENABLED", "true").lower() == "true"
+    RESILIENCE_MIN_TIMEOUT = 2.0
+    RESILIENCE_MAX_TIMEOUT = 60.0
+    RESILIENCE_TIMEOUT_MULTIPLIER = 3.0
+    RESILIENCE_HEDGE_PERCENTILE = 0.95
+    RESILIENCE_MAX_RETRIES = 3
+    RESILIENCE_BACKOFF_BASE = 0.5
+    RESILIENCE_BACKOFF_MAX = 8.0
+    RESILIENCE_FAILURE_THRESHOLD = 5
+    RESILIENCE_RESET_TIMEOUT = 30.0
 
     @classmethod
     def validate(cls):
@@ -1,7 +1,9 @@
 import json
+import sys
 import pandas as pd
-from typing import List, Dict, Any, Union
+from typing import List, Dict, Any, Union, Iterator, Tuple
 from langchain.schema import Document
+from chunk_store import ChunkStore
 
 class JSONDataLoader:
     """Load and process JSON data for RAG system"""
@@ -40,15 +42,16 @@ class JSONDataLoader:
         
         return "\n".join(text_content)
     
-    def create_documents(self, 
-                        text_fields: List[str] = None,
-                        metadata_fields: List[str] = None,
-                        id_field: str = None) -> List[Document]:
-        """Convert JSON data to LangChain Documents"""
+    def iter_records(self,
+                     text_fields: List[str] = None,
+                     metadata_fields: List[str] = None,
+                     id_field: str = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (text, metadata) pairs for every record in the JSON data"""
         if self.data is None:
             self.load_json()
         
-        documents = []
+        # Intern the source path so every record shares one string
+        source = sys.intern(self.json_file_path)
         
         # Handle different JSON structures
         if isinstance(self.data, list):
@@ -58,7 +61,7 @@ class JSONDataLoader:
                     text_content = self.extract_text_fields(item, text_fields)
                     
                     # Create metadata
-                    metadata = {"source": self.json_file_path, "index": i}
+                    metadata = {"source": source, "index": i}
                     
                     # Add ID if specified
                     if id_field and id_field in item:
@@ -71,17 +74,14 @@ class JSONDataLoader:
                                 metadata[field] = item[field]
                     
                     if text_content.strip():
-                        documents.append(Document(
-                            page_content=text_content,
-                            metadata=metadata
-                        ))
+                        yield text_content, metadata
         
         elif isinstance(self.data, dict):
             # Single object or nested structure
             if text_fields:
                 # Treat as single document
                 text_content = self.extract_text_fields(self.data, text_fields)
-                metadata = {"source": self.json_file_path}
+                metadata = {"source": source}
                 
                 if metadata_fields:
                     for field in metadata_fields:
@@ -89,10 +89,7 @@ class JSONDataLoader:
                             metadata[field] = self.data[field]
                 
                 if text_content.strip():
-                    documents.append(Document(
-                        page_content=text_content,
-                        metadata=metadata
-                    ))
+                    yield text_content, metadata
             else:
                 # Try to find nested arrays or objects
                 for key, value in self.data.items():
@@ -101,20 +98,41 @@ class JSONDataLoader:
                             if isinstance(item, dict):
                                 text_content = self.extract_text_fields(item, text_fields)
                                 metadata = {
-                                    "source": self.json_file_path,
+                                    "source": source,
                                     "section": key,
                                     "index": i
                                 }
                                 
                                 if text_content.strip():
-                                    documents.append(Document(
-                                        page_content=text_content,
-                                        metadata=metadata
-                                    ))
+                                    yield text_content, metadata
+    
+    def create_documents(self, 
+                        text_fields: List[str] = None,
+                        metadata_fields: List[str] = None,
+                        id_field: str = None) -> List[Document]:
+        """Convert JSON data to LangChain Documents"""
+        documents = [
+            Document(page_content=text_content, metadata=metadata)
+            for text_content, metadata in self.iter_records(text_fields, metadata_fields, id_field)
+        ]
         
         print(f"✅ Created {len(documents)} documents from JSON data")
         return documents
     
+    def create_chunk_store(self,
+                           text_fields: List[str] = None,
+                           metadata_fields: List[str] = None,
+                           id_field: str = None,
+                           store: ChunkStore = None) -> ChunkStore:
+        """Load JSON records into a compact ChunkStore instead of Documents"""
+        store = store if store is not None else ChunkStore()
+        
+        for text_content, metadata in self.iter_records(text_fields, metadata_fields, id_field):
+            store.add_document(text_content, metadata)
+        
+        print(f"✅ Stored {store.num_documents} documents from JSON data ({len(store.arena)} chars)")
+        return store
+    
     def analyze_structure(self) -> Dict[str, Any]:
         """Analyze JSON structure to help identify fields"""
         if self.data is None:
@@ -0,0 +1,83 @@
+import hashlib
+import sqlite3
+import threading
+from array import array
+from typing import Dict, List, Optional
+from langchain.schema.embeddings import Embeddings
+
+
+class EmbeddingCache:
+    """SQLite-backed cache of embedding vectors keyed by model and text"""
+
+    def __init__(self, path: str = "./embedding_cache.sqlite3", model: str = ""):
+        self.path = path
+        self.model = model
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: List[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for the texts that have one"""
+        keys = {self._key(text): text for text in texts}
+        found = {}
+        with self._lock:
+            key_list = list(keys)
+            for start in range(0, len(key_list), 500):
+                batch = key_list[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[keys[key]] = array("f", blob).tolist()
+        return found
+
+    def put_many(self, texts: List[str], vectors: List[List[float]]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(self._key(text), array("f", vector).tobytes()) for text, vector in zip(texts, vectors)]
+            )
+            self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends texts missing from the cache"""
+
+    def __init__(self, inner: Embeddings, cache: EmbeddingCache):
+        self.inner = inner
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        cached = self.cache.get_many(texts)
+        missing = list(dict.fromkeys(text for text in texts if text not in cached))
+        self.cache.hits += len(texts) - len(missing)
+        self.cache.misses += len(missing)
+        if missing:
+            vectors = self.inner.embed_documents(missing)
+            self.cache.put_many(missing, vectors)
+            cached.update(zip(missing, vectors))
+        return [cached[text] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        # Query embeddings use a different task type, so they get their own key space
+        key = f"query\0{text}"
+        cached: Optional[List[float]] = self.cache.get_many([key]).get(key)
+        if cached is None:
+            cached = self.inner.embed_query(text)
+            self.cache.put_many([key], [cached])
+            self.cache.misses += 1
+        else:
+            self.cache.hits += 1
+        return cached
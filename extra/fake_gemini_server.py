@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Local fake Gemini REST server that injects latency and errors
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+
+class FakeGeminiServer:
+    """Serve generateContent / embedContent / batchEmbedContents with injected faults
+
+    Point the clients at it with GOOGLE_API_ENDPOINT=http://host:port.
+    ``slow_every`` / ``error_every`` make every Nth request slow or failing,
+    deterministically, instead of at the random rates.
+    """
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 latency: float = 0.05,
+                 slow_rate: float = 0.0,
+                 slow_latency: float = 2.0,
+                 error_rate: float = 0.0,
+                 error_status: int = 429,
+                 embedding_dim: int = 32,
+                 slow_every: int = 0,
+                 error_every: int = 0):
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.embedding_dim = embedding_dim
+        self.slow_every = slow_every
+        self.error_every = error_every
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _embed(self, text: str) -> List[float]:
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [digest[i % len(digest)] / 255.0 for i in range(self.embedding_dim)]
+
+    @staticmethod
+    def _injected(number: int, every: int, rate: float) -> bool:
+        if every:
+            return number % every == 0
+        return random.random() < rate
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: dict):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                with server._lock:
+                    server.requests += 1
+                    number = server.requests
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+
+                if server._injected(number, server.slow_every, server.slow_rate):
+                    time.sleep(server.slow_latency)
+                else:
+                    time.sleep(server.latency)
+
+                if server._injected(number, server.error_every, server.error_rate):
+                    self._send(server.error_status, {"error": {
+                        "code": server.error_status,
+                        "message": "Resource exhausted (injected)",
+                        "status": "RESOURCE_EXHAUSTED"
+                    }})
+                    return
+
+                if self.path.endswith(":batchEmbedContents"):
+                    embeddings = [
+                        {"values": server._embed(json.dumps(item.get("content", {})))}
+                        for item in request.get("requests", [])
+                    ]
+                    self._send(200, {"embeddings": embeddings})
+                elif self.path.endswith(":embedContent"):
+                    self._send(200, {"embedding": {"values": server._embed(json.dumps(request.get("content", {})))}})
+                elif self.path.endswith(":generateContent"):
+                    self._send(200, {"candidates": [{
+                        "content": {"role": "model", "parts": [{"text": "Fake answer from the local test server."}]},
+                        "finishReason": "STOP",
+                        "index": 0
+                    }]})
+                else:
+                    self._send(404, {"error": {"code": 404, "message": f"Unknown path {self.path}"}})
+
+        return Handler
+
+    def start(self) -> "FakeGeminiServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Gemini server with injected latency and errors")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="Normal response latency in seconds")
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Fraction of slow responses")
+    parser.add_argument("--slow-latency", type=float, default=2.0, help="Latency of slow responses")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Fraction of error responses")
+    parser.add_argument("--error-status", type=int, default=429, help="HTTP status for injected errors")
+    parser.add_argument("--slow-every", type=int, default=0, help="Make every Nth request slow (overrides --slow-rate)")
+    parser.add_argument("--error-every", type=int, default=0, help="Fail every Nth request (overrides --error-rate)")
+    args = parser.parse_args()
+
+    server = FakeGeminiServer(
+        port=args.port,
+        latency=args.latency,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        slow_every=args.slow_every,
+        error_every=args.error_every
+    )
+    print(f"🧪 Fake Gemini server listening on {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
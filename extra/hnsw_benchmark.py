@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Report HNSW build time, query latency and recall against exact search for stored vectors
+"""
+
+import argparse
+import itertools
+import json
+import time
+import uuid
+from typing import Any, Dict, List
+import chromadb
+import numpy as np
+from config import Config
+from vector_store import hnsw_metadata, vector_distances
+
+
+def load_vectors(persist_directory: str, collection_name: str, limit: int = None, page_size: int = 1000) -> np.ndarray:
+    """Read stored embeddings from a persisted collection (nothing is re-embedded)"""
+    collection = chromadb.PersistentClient(path=persist_directory).get_collection(collection_name)
+    total = collection.count() if limit is None else min(limit, collection.count())
+    pages = []
+    for offset in range(0, total, page_size):
+        rows = collection.get(include=["embeddings"], limit=min(page_size, total - offset), offset=offset)
+        pages.append(np.asarray(rows["embeddings"], dtype=np.float32))
+    return np.concatenate(pages) if pages else np.empty((0, 0), dtype=np.float32)
+
+
+class HNSWBenchmark:
+    """Build throwaway collections per parameter set and compare them with brute force"""
+
+    def __init__(self, vectors: np.ndarray, query_count: int = 100, seed: int = 0):
+        self.vectors = vectors
+        self.client = chromadb.EphemeralClient()
+        rng = np.random.default_rng(seed)
+        # Queries are stored vectors with a little noise, so they are realistic but not exact hits
+        picks = rng.choice(len(vectors), size=min(query_count, len(vectors)), replace=False)
+        noise = rng.normal(scale=0.01, size=(len(picks), vectors.shape[1])).astype(np.float32)
+        self.queries = vectors[picks] + noise
+
+    def _ground_truth(self, vectors: np.ndarray, space: str, k: int) -> List[set]:
+        truth = []
+        for query in self.queries:
+            distances = vector_distances(query, vectors, space)
+            truth.append(set(np.argsort(distances)[:k].tolist()))
+        return truth
+
+    def evaluate(self, size: int, space: str, m: int, construction_ef: int, search_ef: int, k: int) -> Dict[str, Any]:
+        """One result row for a corpus size and parameter set"""
+        vectors = self.vectors[:size]
+        collection = self.client.create_collection(
+            f"hnsw_{uuid.uuid4().hex[:12]}",
+            metadata=hnsw_metadata(space, m, construction_ef, search_ef)
+        )
+        start = time.perf_counter()
+        for batch_start in range(0, len(vectors), 1000):
+            batch = vectors[batch_start:batch_start + 1000]
+            collection.add(
+                ids=[str(i) for i in range(batch_start, batch_start + len(batch))],
+                embeddings=batch.tolist()
+            )
+        build_seconds = time.perf_counter() - start
+
+        truth = self._ground_truth(vectors, space, k)
+        latencies, recalls = [], []
+        for query, expected in zip(self.queries, truth):
+            query_start = time.perf_counter()
+            result = collection.query(query_embeddings=[query.tolist()], n_results=min(k, len(vectors)), include=[])
+            latencies.append(time.perf_counter() - query_start)
+            found = {int(chunk_id) for chunk_id in result["ids"][0]}
+            recalls.append(len(found & expected) / len(expected) if expected else 1.0)
+
+        self.client.delete_collection(collection.name)
+        return {
+            "size": len(vectors),
+            "space": space,
+            "m": m,
+            "construction_ef": construction_ef,
+            "search_ef": search_ef,
+            "k": k,
+            "build_seconds": round(build_seconds, 3),
+            "latency_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+            "latency_p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 3),
+            "recall_at_k": round(float(np.mean(recalls)), 4),
+        }
+
+    def run(self, sizes: List[int], spaces: List[str], ms: List[int],
+            construction_efs: List[int], search_efs: List[int], k: int) -> List[Dict[str, Any]]:
+        results = []
+        for size, space, m, construction_ef, search_ef in itertools.product(
+                sizes, spaces, ms, construction_efs, search_efs):
+            if size > len(self.vectors):
+                continue
+            print(f"🔧 size={size} space={space} M={m} construction_ef={construction_ef} search_ef={search_ef}")
+            results.append(self.evaluate(size, space, m, construction_ef, search_ef, k))
+        return results
+
+
+def print_results(results: List[Dict[str, Any]]):
+    header = f"{'size':>8} {'space':<6} {'M':>3} {'c_ef':>5} {'s_ef':>5} {'build_s':>8} " \
+             f"{'p50_ms':>7} {'p95_ms':>7} {'recall':>6}"
+    print("\n📊 HNSW results:")
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(f"{row['size']:>8} {row['space']:<6} {row['m']:>3} {row['construction_ef']:>5} "
+              f"{row['search_ef']:>5} {row['build_seconds']:>8.2f} {row['latency_p50_ms']:>7.2f} "
+              f"{row['latency_p95_ms']:>7.2f} {row['recall_at_k']:>6.3f}")
+
+
+def main():
+    config = Config()
+    parser = argparse.ArgumentParser(description="Compare HNSW parameters on stored vectors")
+    parser.add_argument("--persist-dir", default="./chroma_db", help="ChromaDB persistence directory")
+    parser.add_argument("--collection", default=config.CHROMADB_COLLECTION_NAME, help="Collection to read vectors from")
+    parser.add_argument("--sizes", nargs="+", type=int, help="Corpus sizes to test (default: the whole collection)")
+    parser.add_argument("--spaces", nargs="+", choices=["l2", "cosine", "ip"], default=[config.HNSW_SPACE])
+    parser.add_argument("--m", nargs="+", type=int, default=[8, config.HNSW_M, 32])
+    parser.add_argument("--construction-ef", nargs="+", type=int, default=[config.HNSW_CONSTRUCTION_EF])
+    parser.add_argument("--search-ef", nargs="+", type=int, default=[config.HNSW_SEARCH_EF, 50, 100])
+    parser.add_argument("--k", type=int, default=config.TOP_K_RESULTS)
+    parser.add_argument("--queries", type=int, default=100, help="Number of sampled query vectors")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.persist_dir, args.collection, limit=max(args.sizes) if args.sizes else None)
+    if not len(vectors):
+        print(f"❌ No stored vectors in collection {args.collection}")
+        return
+    print(f"📚 Loaded {len(vectors)} vectors of dimension {vectors.shape[1]}")
+
+    benchmark = HNSWBenchmark(vectors, query_count=args.queries)
+    results = benchmark.run(args.sizes or [len(vectors)], args.spaces, args.m,
+                            args.construction_ef, args.search_ef, args.k)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"results": results}, file, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Report IVF recall and latency against brute force on stored vectors, including incremental appends
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+import numpy as np
+from config import Config
+from hnsw_benchmark import load_vectors
+from ivf_index import IVFIndex
+
+
+def run_benchmark(vectors: np.ndarray,
+                  space: str,
+                  n_lists: int,
+                  nprobes: List[int],
+                  k: int,
+                  query_count: int = 100,
+                  initial_fraction: float = 0.5,
+                  seed: int = 0) -> Dict[str, Any]:
+    """Train on part of the corpus, append the rest, then re-cluster; evaluate after each phase"""
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(vectors), size=min(query_count, len(vectors)), replace=False)
+    queries = vectors[picks] + rng.normal(scale=0.01, size=(len(picks), vectors.shape[1])).astype(np.float32)
+    ids = [str(i) for i in range(len(vectors))]
+    split = max(1, int(len(vectors) * initial_fraction))
+
+    index = IVFIndex(space=space, n_lists=n_lists)
+    start = time.perf_counter()
+    index.add(ids[:split], vectors[:split], train=False)
+    index.train()
+    phases = {"initial": {"vectors": split, "build_seconds": round(time.perf_counter() - start, 3)}}
+    phases["initial"]["results"] = index.evaluate(queries, k, nprobes)
+
+    start = time.perf_counter()
+    for batch_start in range(split, len(vectors), 1000):
+        index.add(ids[batch_start:batch_start + 1000], vectors[batch_start:batch_start + 1000], train=False)
+    phases["appended"] = {"vectors": len(index), "append_seconds": round(time.perf_counter() - start, 3)}
+    phases["appended"]["results"] = index.evaluate(queries, k, nprobes)
+
+    start = time.perf_counter()
+    index.train()
+    phases["reclustered"] = {"vectors": len(index), "train_seconds": round(time.perf_counter() - start, 3)}
+    phases["reclustered"]["results"] = index.evaluate(queries, k, nprobes)
+    return phases
+
+
+def print_results(phases: Dict[str, Any]):
+    header = f"{'phase':<12} {'nprobe':>6} {'lists':>6} {'vectors':>8} {'recall':>6} " \
+             f"{'ivf_p50':>8} {'ivf_p95':>8} {'exact_p50':>9}"
+    print("\n📊 IVF results (ms):")
+    print(header)
+    print("-" * len(header))
+    for phase, data in phases.items():
+        for row in data["results"]:
+            print(f"{phase:<12} {row['nprobe']:>6} {row['lists']:>6} {row['vectors']:>8} "
+                  f"{row['recall_at_k']:>6.3f} {row['ivf_p50_ms']:>8.3f} {row['ivf_p95_ms']:>8.3f} "
+                  f"{row['exact_p50_ms']:>9.3f}")
+
+
+def main():
+    config = Config()
+    parser = argparse.ArgumentParser(description="Compare IVF search with brute force on stored vectors")
+    parser.add_argument("--persist-dir", default="./chroma_db", help="ChromaDB persistence directory")
+    parser.add_argument("--collection", default=config.CHROMADB_COLLECTION_NAME, help="Collection to read vectors from")
+    parser.add_argument("--limit", type=int, help="Use at most this many stored vectors")
+    parser.add_argument("--space", choices=["l2", "cosine", "ip"], default=config.HNSW_SPACE)
+    parser.add_argument("--lists", type=int, default=config.IVF_LISTS, help="Number of k-means clusters")
+    parser.add_argument("--nprobe", nargs="+", type=int, default=[1, 4, config.IVF_NPROBE, 16, 32])
+    parser.add_argument("--k", type=int, default=config.TOP_K_RESULTS)
+    parser.add_argument("--queries", type=int, default=100, help="Number of sampled query vectors")
+    parser.add_argument("--initial-fraction", type=float, default=0.5,
+                        help="Share of vectors to train on before appending the rest")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.persist_dir, args.collection, limit=args.limit)
+    if not len(vectors):
+        print(f"❌ No stored vectors in collection {args.collection}")
+        return
+    print(f"📚 Loaded {len(vectors)} vectors of dimension {vectors.shape[1]}")
+
+    phases = run_benchmark(vectors, args.space, args.lists, args.nprobe, args.k,
+                           query_count=args.queries, initial_fraction=args.initial_fraction)
+    print_results(phases)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(phases, file, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
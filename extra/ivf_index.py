@@ -0,0 +1,386 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from config import Config
+from rwlock import ReadWriteLock
+
+
+def _scores(vectors: np.ndarray, queries: np.ndarray, space: str, sq_norms: np.ndarray = None) -> np.ndarray:
+    """Distances (rows = vectors, columns = queries); cosine inputs are unit-normalized"""
+    dots = vectors @ queries.T
+    if space == "l2":
+        if sq_norms is None:
+            sq_norms = np.einsum("ij,ij->i", vectors, vectors)
+        return sq_norms[:, None] - 2.0 * dots + np.einsum("ij,ij->i", queries, queries)[None, :]
+    return 1.0 - dots
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray, space: str, block_rows: int = 65536) -> np.ndarray:
+    """Index of the closest centroid for every vector, in blocks to bound memory"""
+    centroid_norms = np.einsum("ij,ij->i", centroids, centroids)
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), block_rows):
+        block = vectors[start:start + block_rows]
+        assignments[start:start + len(block)] = np.argmin(
+            _scores(centroids, block, space, centroid_norms), axis=0
+        )
+    return assignments
+
+
+def kmeans(sample: np.ndarray, n_lists: int, iterations: int, space: str, seed: int = 0) -> np.ndarray:
+    """Lloyd's k-means (spherical for cosine) over a training sample"""
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = _nearest(sample, centroids, space)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_lists)
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+        centroids[filled] = np.add.reduceat(sample[order], starts, axis=0) / counts[filled, None]
+        # Re-seed empty lists from random sample points
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = sample[rng.choice(len(sample), size=len(empty), replace=False)]
+        if space == "cosine":
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    return centroids
+
+
+class IVFIndex:
+    """Inverted-file index: k-means centroids with one posting list of vectors per centroid
+
+    A search scores the centroids, then only the vectors in the ``nprobe``
+    nearest lists. Appends go to the nearest list (buffered until the next
+    search); removals are tombstoned until the next re-clustering. Until
+    enough vectors exist to train, everything lives in one list and search
+    is exact. Searches share a read lock and appends and flushes take the
+    write lock. Training runs k-means and rebuilds the lists from a snapshot
+    outside the lock, one list at a time rather than from a concatenated copy
+    of the corpus, and only the final swap is exclusive.
+    """
+
+    def __init__(self, space: str = None, n_lists: int = None, nprobe: int = None):
+        self.space = space or Config.HNSW_SPACE
+        self.n_lists = n_lists or Config.IVF_LISTS
+        self.nprobe = nprobe or Config.IVF_NPROBE
+        self.centroids: Optional[np.ndarray] = None
+        self.ids: List[str] = []
+        self._row_of: Dict[str, int] = {}
+        self._alive = bytearray()
+        self._deleted = 0
+        self._lists: List[np.ndarray] = []
+        self._list_rows: List[np.ndarray] = []
+        self._list_norms: List[np.ndarray] = []
+        self._pending: Dict[int, List[Tuple[np.ndarray, np.ndarray]]] = {}
+        self._trained_size = 0
+        self._lock = ReadWriteLock()
+        # One training at a time; searches and appends are not blocked by it
+        self._training = threading.Lock()
+        self.stats: Dict[str, Any] = {"trainings": 0, "last_training_seconds": None}
+
+    def __len__(self) -> int:
+        return len(self.ids) - self._deleted
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def _prepare(self, vectors) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix[None, :]
+        if self.space == "cosine":
+            matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        return matrix
+
+    def _flush(self):
+        """Merge buffered appends into their posting lists"""
+        for list_id, parts in self._pending.items():
+            vectors = np.concatenate([self._lists[list_id]] + [part[0] for part in parts])
+            rows = np.concatenate([self._list_rows[list_id]] + [part[1] for part in parts])
+            self._lists[list_id] = vectors
+            self._list_rows[list_id] = rows
+            self._list_norms[list_id] = np.einsum("ij,ij->i", vectors, vectors)
+        self._pending = {}
+
+    def _assign(self, vectors: np.ndarray, rows: np.ndarray):
+        assignments = _nearest(vectors, self.centroids, self.space) if self.trained \
+            else np.zeros(len(vectors), dtype=np.int64)
+        order = np.argsort(assignments, kind="stable")
+        list_ids, starts = np.unique(assignments[order], return_index=True)
+        for list_id, chunk_rows in zip(list_ids, np.split(order, starts[1:])):
+            self._pending.setdefault(int(list_id), []).append((vectors[chunk_rows], rows[chunk_rows]))
+
+    def _reset_lists(self, count: int, dimension: int):
+        self._lists = [np.empty((0, dimension), dtype=np.float32) for _ in range(count)]
+        self._list_rows = [np.empty(0, dtype=np.int64) for _ in range(count)]
+        self._list_norms = [np.empty(0, dtype=np.float32) for _ in range(count)]
+        self._pending = {}
+
+    def add(self, ids: List[str], vectors, train: bool = True) -> None:
+        """Append vectors; with ``train`` the index trains itself once there is enough data"""
+        if not ids:
+            return
+        matrix = self._prepare(vectors)
+        with self._lock.write():
+            if not self._lists:
+                self._reset_lists(1, matrix.shape[1])
+            start = len(self.ids)
+            rows = np.arange(start, start + len(ids), dtype=np.int64)
+            for offset, chunk_id in enumerate(ids):
+                if chunk_id in self._row_of:
+                    self._kill(self._row_of[chunk_id])
+                self._row_of[chunk_id] = start + offset
+            self.ids.extend(ids)
+            self._alive.extend(b"\x01" * len(ids))
+            self._assign(matrix, rows)
+
+        if train and not self.trained and self.ready_to_train():
+            self.train()
+
+    def ready_to_train(self) -> bool:
+        return len(self) >= self.n_lists * Config.IVF_MIN_TRAIN_PER_LIST
+
+    def _kill(self, row: int):
+        if self._alive[row]:
+            self._alive[row] = 0
+            self._deleted += 1
+
+    def remove(self, ids: List[str]) -> None:
+        with self._lock.write():
+            for chunk_id in ids:
+                row = self._row_of.pop(chunk_id, None)
+                if row is not None:
+                    self._kill(row)
+
+    def train(self, sample_size: int = None, iterations: int = None, seed: int = 0):
+        """(Re-)cluster: fit centroids on a sample, then rebuild every posting list"""
+        with self._training:
+            self._train(sample_size, iterations, seed)
+
+    def _train(self, sample_size: int = None, iterations: int = None, seed: int = 0):
+        start = time.perf_counter()
+        with self._lock.write():
+            self._flush()
+            lists, list_rows = list(self._lists), list(self._list_rows)
+            alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+            snapshot_size = len(self.ids)
+
+        built = self._build(lists, list_rows, alive, sample_size or Config.IVF_TRAIN_SAMPLE,
+                            iterations or Config.IVF_KMEANS_ITERATIONS, seed)
+        del lists, list_rows
+        if built is None:
+            return
+        with self._lock.write():
+            self._swap(*built, snapshot_size)
+
+        self.stats["trainings"] += 1
+        self.stats["last_training_seconds"] = round(time.perf_counter() - start, 3)
+        print(f"🧮 Trained IVF index: {len(self._lists)} lists over {len(self.ids)} vectors "
+              f"in {self.stats['last_training_seconds']:.2f}s")
+
+    def _build(self, lists: List[np.ndarray], list_rows: List[np.ndarray], alive: np.ndarray,
+               sample_size: int, iterations: int, seed: int):
+        """Centroids and new (vectors, rows, norms) lists for a snapshot; runs without the lock"""
+        masks = [alive[rows] for rows in list_rows]
+        counts = np.array([int(mask.sum()) for mask in masks], dtype=np.int64)
+        total = int(counts.sum())
+        if not total:
+            return None
+
+        # Sample live vectors list by list instead of concatenating the corpus
+        rng = np.random.default_rng(seed)
+        picks = np.sort(rng.choice(total, size=min(sample_size, total), replace=False))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        sample_parts = []
+        for list_id, (vectors, mask) in enumerate(zip(lists, masks)):
+            low, high = np.searchsorted(picks, [offsets[list_id], offsets[list_id + 1]])
+            if high > low:
+                sample_parts.append(vectors[np.flatnonzero(mask)[picks[low:high] - offsets[list_id]]])
+        sample = np.concatenate(sample_parts)
+        n_lists = min(self.n_lists, len(sample))
+        centroids = kmeans(sample, n_lists, iterations, self.space, seed)
+        del sample, sample_parts
+
+        parts: List[List[Tuple[np.ndarray, np.ndarray]]] = [[] for _ in range(n_lists)]
+        for vectors, rows, mask in zip(lists, list_rows, masks):
+            if not mask.any():
+                continue
+            live_vectors, live_rows = vectors[mask], rows[mask]
+            assignments = _nearest(live_vectors, centroids, self.space)
+            order = np.argsort(assignments, kind="stable")
+            list_ids, starts = np.unique(assignments[order], return_index=True)
+            for list_id, members in zip(list_ids, np.split(order, starts[1:])):
+                parts[int(list_id)].append((live_vectors[members], live_rows[members]))
+
+        dimension = lists[0].shape[1]
+        new_lists, new_rows, new_norms = [], [], []
+        for list_id in range(n_lists):
+            vectors = np.concatenate([part[0] for part in parts[list_id]]) if parts[list_id] \
+                else np.empty((0, dimension), dtype=np.float32)
+            rows = np.concatenate([part[1] for part in parts[list_id]]) if parts[list_id] \
+                else np.empty(0, dtype=np.int64)
+            parts[list_id] = None
+            new_lists.append(vectors)
+            new_rows.append(rows)
+            new_norms.append(np.einsum("ij,ij->i", vectors, vectors))
+        return centroids, new_lists, new_rows, new_norms
+
+    def _swap(self, centroids: np.ndarray, new_lists: List[np.ndarray], new_rows: List[np.ndarray],
+              new_norms: List[np.ndarray], snapshot_size: int):
+        """Install trained lists, keeping changes made while training; caller holds the write lock"""
+        self._flush()
+        alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+
+        # Vectors removed while training are dropped from the new lists
+        for list_id, rows in enumerate(new_rows):
+            mask = alive[rows]
+            if not mask.all():
+                new_lists[list_id] = new_lists[list_id][mask]
+                new_rows[list_id] = rows[mask]
+                new_norms[list_id] = new_norms[list_id][mask]
+
+        # Vectors appended while training are still only in the old lists
+        late_vectors, late_rows = [], []
+        for vectors, rows in zip(self._lists, self._list_rows):
+            mask = rows >= snapshot_size
+            if mask.any():
+                mask &= alive[rows]
+                late_vectors.append(vectors[mask])
+                late_rows.append(rows[mask])
+
+        # Compact away tombstones while renumbering rows
+        kept = np.concatenate(new_rows + late_rows)
+        remap = np.full(len(self.ids), -1, dtype=np.int64)
+        remap[kept] = np.arange(len(kept), dtype=np.int64)
+        self.ids = [self.ids[row] for row in kept]
+        self._row_of = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+        self._alive = bytearray(b"\x01" * len(self.ids))
+        self._deleted = 0
+        self.centroids = centroids
+        self._lists = new_lists
+        self._list_rows = [remap[rows] for rows in new_rows]
+        self._list_norms = new_norms
+        self._pending = {}
+        if late_rows and sum(len(rows) for rows in late_rows):
+            self._assign(np.concatenate(late_vectors), remap[np.concatenate(late_rows)])
+            self._flush()
+        self._trained_size = len(self.ids)
+
+    def needs_recluster(self) -> bool:
+        """True once there is enough data to train, the index outgrew its training size,
+        or tombstones or list skew pile up"""
+        if not self.trained:
+            return bool(self._lists) and self.ready_to_train()
+        if len(self) >= self._trained_size * Config.IVF_RECLUSTER_GROWTH:
+            return True
+        if self._deleted > Config.IVF_RECLUSTER_DELETED_RATIO * max(len(self.ids), 1):
+            return True
+        sizes = [len(rows) for rows in self._list_rows]
+        return max(sizes) > Config.IVF_RECLUSTER_IMBALANCE * (sum(sizes) / len(sizes) + 1)
+
+    def maybe_recluster(self) -> bool:
+        """Train or re-cluster if needed; skipped while another training is running"""
+        with self._lock.read():
+            needed = self.needs_recluster()
+        if not needed or not self._training.acquire(blocking=False):
+            return False
+        try:
+            self._train()
+        finally:
+            self._training.release()
+        return True
+
+    def _scan(self, query_matrix: np.ndarray, probe, k: int) -> List[Tuple[str, float]]:
+        """Top-k over the given lists, including unmerged appends; caller holds the read lock"""
+        distances, rows = [], []
+        for list_id in probe:
+            if len(self._list_rows[list_id]):
+                distances.append(_scores(self._lists[list_id], query_matrix, self.space,
+                                         self._list_norms[list_id])[:, 0])
+                rows.append(self._list_rows[list_id])
+            # Appends that landed after the last flush are scanned unmerged
+            for vectors, pending_rows in self._pending.get(int(list_id), []):
+                distances.append(_scores(vectors, query_matrix, self.space)[:, 0])
+                rows.append(pending_rows)
+        if not rows:
+            return []
+        distances = np.concatenate(distances)
+        rows = np.concatenate(rows)
+        if self._deleted:
+            mask = np.frombuffer(self._alive, dtype=np.uint8)[rows].astype(bool)
+            distances, rows = distances[mask], rows[mask]
+        if len(distances) > k:
+            top = np.argpartition(distances, k - 1)[:k]
+            distances, rows = distances[top], rows[top]
+        order = np.argsort(distances)
+        return [(self.ids[rows[i]], float(distances[i])) for i in order]
+
+    def search(self, query, k: int, nprobe: int = None) -> List[Tuple[str, float]]:
+        """Approximate top-k (id, distance) pairs, closest first"""
+        query_matrix = self._prepare(query)
+        if self._pending:
+            with self._lock.write():
+                self._flush()
+        with self._lock.read():
+            if not self._lists or not len(self):
+                return []
+            if self.trained:
+                centroid_scores = _scores(self.centroids, query_matrix, self.space)[:, 0]
+                probe = np.argsort(centroid_scores)[:nprobe or self.nprobe]
+            else:
+                probe = [0]
+            return self._scan(query_matrix, probe, k)
+
+    def exact_search(self, query, k: int) -> List[Tuple[str, float]]:
+        """Brute-force top-k over every live vector (the recall baseline)"""
+        query_matrix = self._prepare(query)
+        with self._lock.read():
+            if not self._lists or not len(self):
+                return []
+            return self._scan(query_matrix, range(len(self._lists)), k)
+
+    def evaluate(self, queries, k: int, nprobes: List[int]) -> List[Dict[str, Any]]:
+        """Recall@k and latency of IVF search per nprobe, against brute force"""
+        queries = np.asarray(queries, dtype=np.float32)
+        exact_latencies, truth = [], []
+        for query in queries:
+            start = time.perf_counter()
+            truth.append({chunk_id for chunk_id, _ in self.exact_search(query, k)})
+            exact_latencies.append(time.perf_counter() - start)
+
+        rows = []
+        for nprobe in nprobes:
+            latencies, recalls, scanned = [], [], []
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                found = {chunk_id for chunk_id, _ in self.search(query, k, nprobe=nprobe)}
+                latencies.append(time.perf_counter() - start)
+                recalls.append(len(found & expected) / len(expected) if expected else 1.0)
+            rows.append({
+                "nprobe": nprobe,
+                "lists": len(self._lists),
+                "vectors": len(self),
+                "k": k,
+                "recall_at_k": round(float(np.mean(recalls)), 4),
+                "ivf_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+                "ivf_p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 3),
+                "exact_p50_ms": round(float(np.percentile(exact_latencies, 50)) * 1000, 3),
+            })
+        return rows
+
+    def get_info(self) -> Dict[str, Any]:
+        with self._lock.read():
+            sizes = [len(rows) for rows in self._list_rows]
+            return {
+                "space": self.space,
+                "trained": self.trained,
+                "lists": len(self._lists),
+                "nprobe": self.nprobe,
+                "vectors": len(self),
+                "tombstones": self._deleted,
+                "max_list_size": max(sizes) if sizes else 0,
+                **self.stats,
+            }
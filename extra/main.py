@@ -5,9 +5,52 @@ Main script to run the RAG system
 
 import json
 import argparse
+import uuid
+from contextlib import nullcontext
 from pathlib import Path
+from config import Config
 from data_loader import JSONDataLoader
 from rag_system import RAGSystem
+from profiling import Profiler
+from pipeline import print_pipeline_report
+from watcher import JSONWatcher, watch_metadata_fields
+from serving import QueryWorkerPool
+from bulk_query import BulkQueryRunner
+
+def interactive_loop(rag: RAGSystem, workers, query_filter, session_id: str = None):
+    """Prompt for questions until the user quits"""
+    print("\n🎯 RAG system ready! Enter your questions (type 'quit' to exit):")
+    print("=" * 60)
+    
+    while True:
+        try:
+            question = input("\n❓ Your question: ").strip()
+            
+            if question.lower() in ['quit', 'exit', 'q']:
+                break
+            
+            if not question:
+                continue
+            
+            # Process query
+            if workers:
+                result = workers.query(question)
+            else:
+                result = rag.query(question, filter=query_filter, session_id=session_id)
+            
+            print(f"\n💡 Answer: {result['answer']}")
+            
+            if result['source_documents']:
+                print(f"\n📚 Sources ({len(result['source_documents'])} documents):")
+                for i, doc in enumerate(result['source_documents'], 1):
+                    print(f"  {i}. {doc['content']}")
+                    if doc['metadata']:
+                        print(f"     Metadata: {doc['metadata']}")
+        
+        except KeyboardInterrupt:
+            break
+        except Exception as e:
+            print(f"❌ Error processing query: {e}")
 
 def main():
     parser = argparse.ArgumentParser(description="RAG System with LangChain, ChromaDB, and Gemini")
@@ -17,6 +60,28 @@ def main():
     parser.add_argument("--id-field", help="Field to use as document ID (optional)")
     parser.add_argument("--analyze-only", action="store_true", help="Only analyze JSON structure")
     parser.add_argument("--persist-dir", default="./chroma_db", help="ChromaDB persistence directory")
+    parser.add_argument("--shard-by-act", action="store_true", help="Store each act in its own collection and route queries")
+    parser.add_argument("--titles-files", nargs="+", help="Titles-only JSON files used to route queries to act shards")
+    parser.add_argument("--filter", help='Metadata filter as JSON, e.g. \'{"section": {"$gte": 9, "$lte": 14}}\'')
+    parser.add_argument("--vector-index", choices=["hnsw", "ivf"], help="Search index for the default collection; ivf is kept in memory alongside Chroma's HNSW (default: Config.VECTOR_INDEX)")
+    parser.add_argument("--rebuild-index", action="store_true", help="Rebuild stored collections with the Config.HNSW_* settings and exit")
+    parser.add_argument("--adaptive-k", action="store_true", help="Choose how many chunks to send per query from the score distribution")
+    parser.add_argument("--profile", action="store_true", help="Profile ingestion and each query (cProfile, tracemalloc, flamegraph stacks)")
+    parser.add_argument("--profile-dir", default="./profiles", help="Directory for profiling output")
+    parser.add_argument("--no-pipeline", action="store_true", help="Ingest in sequential batches instead of the staged pipeline")
+    parser.add_argument("--split-workers", type=int, help="Pipeline splitter threads (default: Config.PIPELINE_SPLIT_WORKERS)")
+    parser.add_argument("--embed-workers", type=int, help="Pipeline embedding threads (default: Config.PIPELINE_EMBED_WORKERS)")
+    parser.add_argument("--eager-init", action="store_true", help="Build all components at start-up instead of on first use")
+    parser.add_argument("--warm-up", action="store_true", help="Prime connections and load the index before the first question")
+    parser.add_argument("--watch", action="store_true", help="Live-reindex changed JSON records while serving queries")
+    parser.add_argument("--publish-index", metavar="DIR", help="Publish a memory-mapped index generation for read-only workers")
+    parser.add_argument("--workers", type=int, help="Answer questions with N worker processes sharing the published index")
+    parser.add_argument("--chat", action="store_true", help="Keep conversation context between questions (multi-turn session)")
+    parser.add_argument("--queries-file", help="Answer every question in this JSON Lines file instead of prompting")
+    parser.add_argument("--question-field", help="JSONL field holding the question (default: question, query, body or title)")
+    parser.add_argument("--output", help="JSON Lines results file for --queries-file (appended to, and used to resume)")
+    parser.add_argument("--concurrency", type=int, help="Questions in flight for --queries-file (default: Config.BULK_QUERY_CONCURRENCY)")
+    parser.add_argument("--watch-interval", type=float, default=2.0, help="Seconds between watch-mode checks")
     
     args = parser.parse_args()
     
@@ -25,9 +90,38 @@ def main():
         print(f"❌ Error: JSON file not found: {args.json_file}")
         return
     
+    if args.queries_file and not args.output:
+        print("❌ Error: --queries-file requires --output")
+        return
+    if args.queries_file and not Path(args.queries_file).exists():
+        print(f"❌ Error: queries file not found: {args.queries_file}")
+        return
+    
+    if args.workers and not args.publish_index:
+        print("❌ Error: --workers requires --publish-index")
+        return
+    if args.workers and args.chat:
+        print("❌ Error: --chat is not supported with --workers")
+        return
+    if args.workers and args.filter:
+        print("❌ Error: --filter is not supported with --workers")
+        return
+    
+    query_filter = None
+    if args.filter:
+        try:
+            query_filter = json.loads(args.filter)
+        except json.JSONDecodeError as e:
+            print(f"❌ Error: invalid --filter JSON: {e}")
+            return
+    
+    profiler = Profiler(output_dir=args.profile_dir) if args.profile else None
+    
     # Load and analyze JSON data
     print("📊 Loading JSON data...")
     loader = JSONDataLoader(args.json_file)
+    with profiler.profile("parse") if profiler else nullcontext():
+        loader.load_json()
     
     # Analyze structure
     analysis = loader.analyze_structure()
@@ -42,57 +136,104 @@ def main():
             print(f"  {field}: {info['type']} - {info['sample']}")
         return
     
-    # Create documents
-    print("\n📄 Creating documents...")
-    documents = loader.create_documents(
-        text_fields=args.text_fields,
-        metadata_fields=args.metadata_fields,
-        id_field=args.id_field
-    )
+    if args.watch:
+        # Watched records are found again by these fields, so chunks must carry them
+        args.metadata_fields = watch_metadata_fields(args.metadata_fields)
     
-    if not documents:
-        print("❌ No documents created. Check your JSON structure and field specifications.")
-        return
+    # Create documents (the staged pipeline parses while it ingests instead)
+    store = None
+    if args.no_pipeline:
+        print("\n📄 Creating documents...")
+        with profiler.profile("documents") if profiler else nullcontext():
+            store = loader.create_chunk_store(
+                text_fields=args.text_fields,
+                metadata_fields=args.metadata_fields,
+                id_field=args.id_field
+            )
+        
+        if not store.num_documents:
+            print("❌ No documents created. Check your JSON structure and field specifications.")
+            return
+    
+    if args.shard_by_act:
+        Config.SHARDING_ENABLED = True
+    if args.titles_files:
+        Config.SHARD_TITLES_FILES = args.titles_files
+    if args.adaptive_k:
+        Config.ADAPTIVE_RETRIEVAL = True
+    if args.vector_index:
+        Config.VECTOR_INDEX = args.vector_index
     
     # Initialize RAG system
     print("\n🚀 Initializing RAG system...")
     rag = RAGSystem()
-    rag.initialize(persist_directory=args.persist_dir)
+    if profiler:
+        rag.enable_profiling(profiler=profiler)
+    rag.initialize(
+        persist_directory=args.persist_dir,
+        lazy=False if args.eager_init else None,
+        warm_up=True if args.warm_up else None
+    )
+    
+    if args.rebuild_index:
+        rag.rebuild_index()
+        return
     
     # Add documents to vector store
     print("\n📚 Adding documents to vector store...")
-    rag.add_documents(documents)
+    if store is not None:
+        rag.add_chunk_store(store)
+    else:
+        report = rag.ingest_pipelined(
+            loader.iter_records(args.text_fields, args.metadata_fields, args.id_field),
+            split_workers=args.split_workers,
+            embed_workers=args.embed_workers
+        )
+        print_pipeline_report(report)
+        if not report["records"]:
+            print("❌ No documents created. Check your JSON structure and field specifications.")
+            return
     
-    # Interactive query loop
-    print("\n🎯 RAG system ready! Enter your questions (type 'quit' to exit):")
-    print("=" * 60)
+    watcher = None
+    if args.watch:
+        watcher = JSONWatcher(
+            rag,
+            [args.json_file],
+            text_fields=args.text_fields,
+            metadata_fields=args.metadata_fields,
+            id_field=args.id_field,
+            interval=args.watch_interval
+        )
+        watcher.start()
     
-    while True:
-        try:
-            question = input("\n❓ Your question: ").strip()
-            
-            if question.lower() in ['quit', 'exit', 'q']:
-                break
-            
-            if not question:
-                continue
-            
-            # Process query
-            result = rag.query(question)
-            
-            print(f"\n💡 Answer: {result['answer']}")
-            
-            if result['source_documents']:
-                print(f"\n📚 Sources ({len(result['source_documents'])} documents):")
-                for i, doc in enumerate(result['source_documents'], 1):
-                    print(f"  {i}. {doc['content']}")
-                    if doc['metadata']:
-                        print(f"     Metadata: {doc['metadata']}")
-        
-        except KeyboardInterrupt:
-            break
-        except Exception as e:
-            print(f"❌ Error processing query: {e}")
+    workers = None
+    if args.publish_index:
+        rag.publish_index(args.publish_index)
+        if watcher:
+            # This process is the single writer; re-publish after every live re-index
+            rag.vector_manager.add_invalidation_listener(lambda keys: rag.publish_index(args.publish_index))
+        if args.workers:
+            workers = QueryWorkerPool(args.publish_index, processes=args.workers)
+    
+    if args.queries_file:
+        if workers:
+            query_fn = workers.query
+        else:
+            query_fn = lambda question: rag.query(question, filter=query_filter)
+        BulkQueryRunner(query_fn, concurrency=args.concurrency).run(
+            args.queries_file, args.output, question_field=args.question_field
+        )
+    else:
+        interactive_loop(rag, workers, query_filter, session_id=uuid.uuid4().hex if args.chat else None)
+    
+    if watcher:
+        watcher.stop()
+    
+    if workers:
+        workers.close()
+    
+    if profiler:
+        profiler.print_summary()
     
     print("\n👋 Goodbye!")
 
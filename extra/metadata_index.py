@@ -0,0 +1,196 @@
+import bisect
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+_COMPARISON_OPS = ("$gt", "$gte", "$lt", "$lte")
+_SET_OPS = ("$eq", "$ne", "$in", "$nin")
+_NUMBER_PATTERN = re.compile(r"(\d+(?:\.\d+)?)([a-z]*)", re.IGNORECASE)
+
+
+def numeric_key(value: Any) -> Optional[Tuple[float, str]]:
+    """Ordering key of a metadata value; "Section 13B" -> (13.0, "b")
+
+    The letter suffix sorts inserted sections after their base section, so
+    13 < 13A < 13B < 14.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return (float(value), "")
+    if isinstance(value, str):
+        match = _NUMBER_PATTERN.search(value)
+        if match:
+            return (float(match.group(1)), match.group(2).lower())
+    return None
+
+
+class MetadataIndex:
+    """In-memory inverted index over chunk metadata for pre-filtering searches
+
+    Filters use Chroma-style syntax: ``{"field": value}``, ``{"field": {"$in": [...]}}``,
+    ``$eq``/``$ne``/``$nin``, ranges with ``$gt``/``$gte``/``$lt``/``$lte`` and
+    ``$and``/``$or`` lists. Ranges compare numerically, lettered sections
+    after their base section, so ``{"section": {"$gte": 9, "$lte": 14}}``
+    matches "Section 9" through "Section 14" (including "Section 13B", not "Section 14A").
+    """
+
+    def __init__(self):
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, Dict[Any, Set[str]]] = {}
+        # field -> (sorted numeric keys, original values per key), rebuilt lazily
+        self._numeric: Dict[str, Tuple[List[Tuple[float, str]], List[Any]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._metadata)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._metadata
+
+    def metadata(self, chunk_id: str) -> Dict[str, Any]:
+        return self._metadata[chunk_id]
+
+    def add(self, ids: Iterable[str], metadatas: Iterable[Dict[str, Any]]):
+        """Index chunk metadata by id"""
+        for chunk_id, metadata in zip(ids, metadatas):
+            if chunk_id in self._metadata:
+                self.remove([chunk_id])
+            self._metadata[chunk_id] = metadata
+            for field, value in metadata.items():
+                try:
+                    self._postings.setdefault(field, {}).setdefault(value, set()).add(chunk_id)
+                except TypeError:
+                    continue
+                self._numeric.pop(field, None)
+
+    def remove(self, ids: Iterable[str]):
+        """Drop chunks from the index"""
+        for chunk_id in ids:
+            metadata = self._metadata.pop(chunk_id, None)
+            if metadata is None:
+                continue
+            for field, value in metadata.items():
+                postings = self._postings.get(field, {})
+                try:
+                    members = postings.get(value)
+                except TypeError:
+                    continue
+                if members is not None:
+                    members.discard(chunk_id)
+                    if not members:
+                        del postings[value]
+                        self._numeric.pop(field, None)
+
+    def _numeric_values(self, field: str) -> Tuple[List[Tuple[float, str]], List[Any]]:
+        if field not in self._numeric:
+            # Ties (13 and "Section 13") are broken by type and text, never by comparing values
+            pairs = sorted(
+                (
+                    (number, value)
+                    for value in self._postings.get(field, {})
+                    for number in [numeric_key(value)]
+                    if number is not None
+                ),
+                key=lambda pair: (pair[0], type(pair[1]).__name__, str(pair[1]))
+            )
+            self._numeric[field] = ([number for number, _ in pairs], [value for _, value in pairs])
+        return self._numeric[field]
+
+    def _range_values(self, field: str, condition: Dict[str, Any]) -> List[Any]:
+        numbers, values = self._numeric_values(field)
+
+        def bound(op: str) -> Tuple[float, str]:
+            key = numeric_key(condition[op])
+            if key is None:
+                raise ValueError(f"Range bound for '{field}' must be numeric, got {condition[op]!r}")
+            return key
+
+        low, high = 0, len(numbers)
+        if "$gte" in condition:
+            low = max(low, bisect.bisect_left(numbers, bound("$gte")))
+        if "$gt" in condition:
+            low = max(low, bisect.bisect_right(numbers, bound("$gt")))
+        if "$lte" in condition:
+            high = min(high, bisect.bisect_right(numbers, bound("$lte")))
+        if "$lt" in condition:
+            high = min(high, bisect.bisect_left(numbers, bound("$lt")))
+        return values[low:high]
+
+    def matching_values(self, field: str, condition: Any) -> List[Any]:
+        """Distinct indexed values of ``field`` that satisfy one field condition"""
+        postings = self._postings.get(field, {})
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        unknown = set(condition) - set(_COMPARISON_OPS) - set(_SET_OPS)
+        if unknown:
+            raise ValueError(f"Unsupported filter operator(s) for '{field}': {sorted(unknown)}")
+
+        candidates = list(postings)
+        if any(op in condition for op in _COMPARISON_OPS):
+            candidates = self._range_values(field, condition)
+        if "$eq" in condition:
+            candidates = [value for value in candidates if value == condition["$eq"]]
+        if "$in" in condition:
+            allowed = list(condition["$in"])
+            candidates = [value for value in candidates if value in allowed]
+        if "$ne" in condition:
+            candidates = [value for value in candidates if value != condition["$ne"]]
+        if "$nin" in condition:
+            excluded = list(condition["$nin"])
+            candidates = [value for value in candidates if value not in excluded]
+        return candidates
+
+    def evaluate(self, where: Dict[str, Any]) -> Set[str]:
+        """Return the ids of all chunks matching a filter"""
+        result: Optional[Set[str]] = None
+        for key, condition in where.items():
+            if key == "$and":
+                matches = self._intersect(self.evaluate(clause) for clause in condition)
+            elif key == "$or":
+                matches = set()
+                for clause in condition:
+                    matches |= self.evaluate(clause)
+            elif key.startswith("$"):
+                raise ValueError(f"Unsupported filter operator: {key}")
+            else:
+                postings = self._postings.get(key, {})
+                matches = set()
+                for value in self.matching_values(key, condition):
+                    matches |= postings[value]
+            result = matches if result is None else result & matches
+            if not result:
+                return set()
+        return result if result is not None else set(self._metadata)
+
+    @staticmethod
+    def _intersect(sets: Iterable[Set[str]]) -> Set[str]:
+        result: Optional[Set[str]] = None
+        for matches in sets:
+            result = matches if result is None else result & matches
+        return result or set()
+
+    def to_chroma_where(self, where: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Rewrite a filter as a Chroma ``where`` clause of ``$in`` lists of matching values
+
+        Numeric ranges over string fields like "Section 13B" cannot be expressed
+        in Chroma directly, so every leaf is resolved to its matching values.
+        Returns None when the filter cannot match anything.
+        """
+        clauses = []
+        for key, condition in where.items():
+            if key in ("$and", "$or"):
+                parts = [self.to_chroma_where(clause) for clause in condition]
+                if key == "$and" and any(part is None for part in parts):
+                    return None
+                parts = [part for part in parts if part is not None]
+                if not parts:
+                    return None
+                clauses.append(parts[0] if len(parts) == 1 else {key: parts})
+            else:
+                values = self.matching_values(key, condition)
+                if not values:
+                    return None
+                clauses.append({key: {"$in": values}})
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
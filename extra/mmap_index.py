@@ -0,0 +1,260 @@
+import fcntl
+import json
+import mmap
+import os
+import shutil
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain.schema import Document
+from config import Config
+
+# Name of the file holding the directory name of the live generation
+CURRENT_FILE = "CURRENT"
+WRITER_LOCK_FILE = "writer.lock"
+
+
+def _generation_name(generation: int) -> str:
+    return f"gen-{generation:06d}"
+
+
+def read_current(root: str) -> Optional[str]:
+    """Directory name of the published generation, or None if nothing is published"""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), "r", encoding="utf-8") as file:
+            return file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+class MmapIndexWriter:
+    """Single writer that publishes immutable index generations
+
+    Each generation is a directory of flat files (vectors, norms, chunk text
+    and metadata with offset tables). It is written under a temporary name,
+    renamed into place and then made live by atomically replacing CURRENT,
+    so readers only ever see complete generations. A file lock keeps a
+    second writer out.
+    """
+
+    def __init__(self, root: str, keep: int = None):
+        self.root = root
+        self.keep = keep or Config.MMAP_KEEP_GENERATIONS
+        os.makedirs(root, exist_ok=True)
+
+    def _next_generation(self) -> int:
+        generations = [
+            int(name.split("-", 1)[1]) for name in os.listdir(self.root)
+            if name.startswith("gen-") and name[4:].isdigit()
+        ]
+        return max(generations, default=0) + 1
+
+    def publish(self,
+                batches: Iterable[Tuple[List[str], List[List[float]], List[str], List[Dict[str, Any]]]],
+                space: str = "l2") -> int:
+        """Write (ids, vectors, texts, metadatas) batches as a new generation and make it live"""
+        with open(os.path.join(self.root, WRITER_LOCK_FILE), "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise Exception(f"Another writer is publishing to {self.root}")
+
+            generation = self._next_generation()
+            name = _generation_name(generation)
+            staging = os.path.join(self.root, f".{name}.tmp")
+            shutil.rmtree(staging, ignore_errors=True)
+            os.makedirs(staging)
+            try:
+                count, dimension = self._write_files(staging, batches)
+                manifest = {
+                    "generation": generation,
+                    "count": count,
+                    "dimension": dimension,
+                    "space": space,
+                    "created_at": time.time(),
+                }
+                with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as file:
+                    json.dump(manifest, file)
+                    file.flush()
+                    os.fsync(file.fileno())
+                os.rename(staging, os.path.join(self.root, name))
+            except Exception:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+
+            pointer = os.path.join(self.root, f".{CURRENT_FILE}.tmp")
+            with open(pointer, "w", encoding="utf-8") as file:
+                file.write(name)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(pointer, os.path.join(self.root, CURRENT_FILE))
+
+            self._prune(generation)
+            return generation
+
+    def _write_files(self, directory: str, batches) -> Tuple[int, int]:
+        count, dimension = 0, 0
+        text_offset, meta_offset = 0, 0
+        paths = {name: os.path.join(directory, name)
+                 for name in ["vectors.f32", "norms.f32", "text.bin", "text.idx", "meta.bin", "meta.idx"]}
+        files = {name: open(path, "wb") for name, path in paths.items()}
+        try:
+            # Offset tables start at 0 and hold one end offset per row
+            files["text.idx"].write(np.zeros(1, dtype=np.int64).tobytes())
+            files["meta.idx"].write(np.zeros(1, dtype=np.int64).tobytes())
+            for ids, vectors, texts, metadatas in batches:
+                if not ids:
+                    continue
+                matrix = np.asarray(vectors, dtype=np.float32)
+                if dimension and matrix.shape[1] != dimension:
+                    raise ValueError(f"Vector dimension changed from {dimension} to {matrix.shape[1]}")
+                dimension = matrix.shape[1]
+                files["vectors.f32"].write(matrix.tobytes())
+                files["norms.f32"].write(np.linalg.norm(matrix, axis=1).astype(np.float32).tobytes())
+
+                text_ends, meta_ends = [], []
+                for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                    encoded = (text or "").encode("utf-8")
+                    files["text.bin"].write(encoded)
+                    text_offset += len(encoded)
+                    text_ends.append(text_offset)
+                    encoded = json.dumps({"id": chunk_id, "metadata": metadata or {}}).encode("utf-8")
+                    files["meta.bin"].write(encoded)
+                    meta_offset += len(encoded)
+                    meta_ends.append(meta_offset)
+                files["text.idx"].write(np.asarray(text_ends, dtype=np.int64).tobytes())
+                files["meta.idx"].write(np.asarray(meta_ends, dtype=np.int64).tobytes())
+                count += len(ids)
+            for file in files.values():
+                file.flush()
+                os.fsync(file.fileno())
+        finally:
+            for file in files.values():
+                file.close()
+        return count, dimension
+
+    def _prune(self, generation: int):
+        """Delete generations older than the last ``keep``
+
+        Readers still mapping a deleted generation keep working: the pages
+        stay valid until they unmap and switch to the new one.
+        """
+        for name in os.listdir(self.root):
+            if name.startswith("gen-") and name[4:].isdigit() and int(name[4:]) <= generation - self.keep:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+
+class _Generation:
+    """Read-only memory maps over one published generation"""
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as file:
+            self.manifest = json.load(file)
+        self.name = os.path.basename(directory)
+        self.generation = self.manifest["generation"]
+        self.count = self.manifest["count"]
+        self.dimension = self.manifest["dimension"]
+        self.space = self.manifest["space"]
+        self.text_offsets = np.fromfile(os.path.join(directory, "text.idx"), dtype=np.int64)
+        self.meta_offsets = np.fromfile(os.path.join(directory, "meta.idx"), dtype=np.int64)
+        if self.count:
+            self.vectors = np.memmap(os.path.join(directory, "vectors.f32"), dtype=np.float32,
+                                     mode="r", shape=(self.count, self.dimension))
+            self.norms = np.memmap(os.path.join(directory, "norms.f32"), dtype=np.float32,
+                                   mode="r", shape=(self.count,))
+            self.text = self._map(os.path.join(directory, "text.bin"))
+            self.meta = self._map(os.path.join(directory, "meta.bin"))
+
+    @staticmethod
+    def _map(path: str):
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return b""
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def document(self, row: int) -> Document:
+        text = self.text[self.text_offsets[row]:self.text_offsets[row + 1]].decode("utf-8")
+        record = json.loads(self.meta[self.meta_offsets[row]:self.meta_offsets[row + 1]])
+        return Document(page_content=text, metadata=record["metadata"])
+
+
+class MmapIndex:
+    """Read-only view of the live generation, shared between processes through the page cache
+
+    Vectors, chunk text and metadata are memory-mapped, so any number of
+    worker processes searching the same generation use one physical copy.
+    Search is exact (brute force over the mapped vectors in blocks).
+    """
+
+    def __init__(self, root: str, refresh_interval: float = None):
+        self.root = root
+        self.refresh_interval = Config.MMAP_REFRESH_INTERVAL if refresh_interval is None else refresh_interval
+        self.block_rows = Config.MMAP_SEARCH_BLOCK_ROWS
+        self._current: Optional[_Generation] = None
+        self._checked_at = 0.0
+        if not self.refresh():
+            raise ValueError(f"No published index generation found in {root}")
+
+    @property
+    def generation(self) -> int:
+        return self._current.generation
+
+    @property
+    def count(self) -> int:
+        return self._current.count
+
+    def refresh(self) -> bool:
+        """Switch to the latest published generation; True if one is mapped"""
+        self._checked_at = time.monotonic()
+        name = read_current(self.root)
+        if name is None:
+            return self._current is not None
+        if self._current is None or self._current.name != name:
+            # Swapping the reference is atomic; in-flight searches finish on the old maps
+            self._current = _Generation(os.path.join(self.root, name))
+            print(f"🗺️  Mapped index generation {self._current.generation} ({self._current.count} chunks)")
+        return True
+
+    def maybe_refresh(self):
+        if time.monotonic() - self._checked_at >= self.refresh_interval:
+            self.refresh()
+
+    def _distances(self, current: _Generation, query: np.ndarray, rows: slice) -> np.ndarray:
+        dots = current.vectors[rows] @ query
+        if current.space == "cosine":
+            norms = current.norms[rows] * np.linalg.norm(query)
+            return 1.0 - dots / np.where(norms == 0, 1.0, norms)
+        if current.space == "ip":
+            return 1.0 - dots
+        # Squared L2 from precomputed norms: |v|^2 - 2 v.q + |q|^2
+        return current.norms[rows] ** 2 - 2.0 * dots + float(query @ query)
+
+    def search(self, query_embedding: List[float], k: int) -> List[Tuple[Document, float]]:
+        """Exact top-k (document, distance) pairs, closest first"""
+        self.maybe_refresh()
+        current = self._current
+        if not current.count:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        best_rows = np.empty(0, dtype=np.int64)
+        best_distances = np.empty(0, dtype=np.float32)
+        for start in range(0, current.count, self.block_rows):
+            distances = self._distances(current, query, slice(start, start + self.block_rows))
+            top = np.argpartition(distances, k - 1)[:k] if len(distances) > k else np.arange(len(distances))
+            best_rows = np.concatenate([best_rows, top + start])
+            best_distances = np.concatenate([best_distances, distances[top]])
+            if len(best_rows) > k:
+                keep = np.argpartition(best_distances, k - 1)[:k]
+                best_rows, best_distances = best_rows[keep], best_distances[keep]
+        order = np.argsort(best_distances)
+        return [(current.document(int(best_rows[i])), float(best_distances[i])) for i in order]
+
+    def get_info(self) -> Dict[str, Any]:
+        current = self._current
+        return {
+            "root": self.root,
+            "generation": current.generation,
+            "count": current.count,
+            "dimension": current.dimension,
+            "space": current.space,
+        }
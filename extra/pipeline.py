@@ -0,0 +1,249 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from langchain.schema import Document
+from config import Config
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class StageMetrics:
+    """Counters for one pipeline stage"""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_seconds = 0.0
+        self.queue_depth_sum = 0
+        self.queue_depth_samples = 0
+        self.queue_depth_max = 0
+        self._lock = threading.Lock()
+
+    def record(self, items_in: int, items_out: int, busy: float, depth: int):
+        with self._lock:
+            self.items_in += items_in
+            self.items_out += items_out
+            self.busy_seconds += busy
+            self.queue_depth_sum += depth
+            self.queue_depth_samples += 1
+            self.queue_depth_max = max(self.queue_depth_max, depth)
+
+    def as_dict(self, wall_seconds: float) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "throughput_per_second": round(self.items_in / wall_seconds, 2) if wall_seconds else 0.0,
+            "utilization": round(self.busy_seconds / (wall_seconds * self.workers), 3) if wall_seconds else 0.0,
+            "avg_queue_depth": round(self.queue_depth_sum / self.queue_depth_samples, 2) if self.queue_depth_samples else 0.0,
+            "max_queue_depth": self.queue_depth_max,
+        }
+
+
+class _Stage:
+    """A pool of worker threads reading one bounded queue and writing the next"""
+
+    def __init__(self, pipeline: "IngestionPipeline", name: str, workers: int,
+                 handler: Callable[[Any], List[Any]], in_queue: queue.Queue,
+                 out_queue: Optional[queue.Queue], next_workers: int, batch_size: int = 1,
+                 linger: float = 0.0):
+        self.pipeline = pipeline
+        self.name = name
+        self.workers = workers
+        self.handler = handler
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.next_workers = next_workers
+        self.batch_size = batch_size
+        self.linger = linger
+        self.metrics = StageMetrics(name, workers)
+        self._remaining = workers
+        self._lock = threading.Lock()
+        self.threads: List[threading.Thread] = []
+
+    def _take(self) -> Tuple[List[Any], bool]:
+        """Block for one item, then top up the batch for at most ``linger`` seconds"""
+        first = self.in_queue.get()
+        if first is _DONE:
+            return [], True
+        items = [first]
+        deadline = time.perf_counter() + self.linger
+        while len(items) < self.batch_size:
+            try:
+                item = self.in_queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except queue.Empty:
+                break
+            if item is _DONE:
+                return items, True
+            items.append(item)
+        return items, False
+
+    def _run(self):
+        try:
+            while not self.pipeline.aborted:
+                depth = self.in_queue.qsize()
+                items, done = self._take()
+                if items:
+                    start = time.perf_counter()
+                    outputs = self.handler(items if self.batch_size > 1 else items[0])
+                    busy = time.perf_counter() - start
+                    if self.out_queue is not None:
+                        for output in outputs:
+                            self.pipeline.put(self.out_queue, output)
+                    self.metrics.record(len(items), len(outputs), busy, depth)
+                if done:
+                    break
+        except Exception as e:
+            self.pipeline.fail(self.name, e)
+        finally:
+            self._finish()
+
+    def _finish(self):
+        with self._lock:
+            self._remaining -= 1
+            last = self._remaining == 0
+        if last and self.out_queue is not None:
+            # Last worker out tells every downstream worker to stop
+            for _ in range(self.next_workers):
+                self.pipeline.put(self.out_queue, _DONE, force=True)
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"ingest-{self.name}-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+
+class IngestionPipeline:
+    """Overlap parsing, splitting, embedding and Chroma writes with bounded queues
+
+    Each stage runs its own worker threads; bounded queues between stages
+    provide backpressure so a slow stage throttles the ones before it.
+    """
+
+    def __init__(self,
+                 vector_manager,
+                 split_workers: int = None,
+                 embed_workers: int = None,
+                 write_workers: int = None,
+                 queue_size: int = None,
+                 embed_batch_size: int = None):
+        config = Config()
+        self.vector_manager = vector_manager
+        self.split_workers = split_workers or config.PIPELINE_SPLIT_WORKERS
+        self.embed_workers = embed_workers or config.PIPELINE_EMBED_WORKERS
+        self.write_workers = write_workers or config.PIPELINE_WRITE_WORKERS
+        self.queue_size = queue_size or config.PIPELINE_QUEUE_SIZE
+        self.embed_batch_size = embed_batch_size or config.INGEST_BATCH_SIZE
+        self.batch_linger = config.PIPELINE_BATCH_LINGER
+        self.aborted = False
+        self._errors: List[Tuple[str, Exception]] = []
+        self._error_lock = threading.Lock()
+
+    def fail(self, stage: str, error: Exception):
+        with self._error_lock:
+            self._errors.append((stage, error))
+            self.aborted = True
+
+    def put(self, target: queue.Queue, item: Any, force: bool = False):
+        """Blocking put that gives up once the pipeline is aborted"""
+        while True:
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if self.aborted:
+                    if force:
+                        # Make room so stop markers still get through
+                        try:
+                            target.get_nowait()
+                        except queue.Empty:
+                            pass
+                    else:
+                        return
+
+    def _split(self, record: Tuple[str, Dict[str, Any]]) -> List[Document]:
+        text, metadata = record
+        return [
+            Document(page_content=chunk, metadata=metadata)
+            for chunk in self.vector_manager.text_splitter.split_text(text)
+        ]
+
+    def _embed(self, documents: List[Document]) -> List[Tuple[List[Document], List[List[float]]]]:
+        vectors = self.vector_manager.embeddings.embed_documents([doc.page_content for doc in documents])
+        return [(documents, vectors)]
+
+    def _write(self, batch: Tuple[List[Document], List[List[float]]]) -> List[Any]:
+        documents, vectors = batch
+        self.vector_manager.write_embedded(documents, vectors)
+        return [batch]
+
+    def run(self, records: Iterable[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+        """Ingest (text, metadata) records and return per-stage metrics"""
+        split_queue = queue.Queue(self.queue_size)
+        embed_queue = queue.Queue(self.queue_size)
+        write_queue = queue.Queue(self.queue_size)
+
+        stages = [
+            _Stage(self, "split", self.split_workers, self._split, split_queue, embed_queue, self.embed_workers),
+            _Stage(self, "embed", self.embed_workers, self._embed, embed_queue, write_queue, self.write_workers,
+                   batch_size=self.embed_batch_size, linger=self.batch_linger),
+            _Stage(self, "write", self.write_workers, self._write, write_queue, None, 0),
+        ]
+        parse_metrics = StageMetrics("parse", 1)
+
+        start = time.perf_counter()
+        for stage in stages:
+            stage.start()
+
+        # Parsing runs on the calling thread and feeds the first queue
+        try:
+            iterator = iter(records)
+            while not self.aborted:
+                parse_start = time.perf_counter()
+                try:
+                    record = next(iterator)
+                except StopIteration:
+                    break
+                parse_metrics.record(1, 1, time.perf_counter() - parse_start, 0)
+                self.put(split_queue, record)
+        except Exception as e:
+            self.fail("parse", e)
+        finally:
+            for _ in range(self.split_workers):
+                self.put(split_queue, _DONE, force=True)
+
+        for stage in stages:
+            for thread in stage.threads:
+                thread.join()
+        wall_seconds = time.perf_counter() - start
+
+        if self._errors:
+            stage, error = self._errors[0]
+            raise Exception(f"Ingestion pipeline failed in {stage} stage: {error}")
+
+        report = {
+            "wall_seconds": round(wall_seconds, 3),
+            "records": parse_metrics.items_out,
+            "chunks": stages[1].metrics.items_in,
+            "stages": {
+                metrics.name: metrics.as_dict(wall_seconds)
+                for metrics in [parse_metrics] + [stage.metrics for stage in stages]
+            }
+        }
+        return report
+
+
+def print_pipeline_report(report: Dict[str, Any]):
+    """Print stage throughput and queue depth"""
+    print(f"\n🏭 Ingested {report['records']} records / {report['chunks']} chunks "
+          f"in {report['wall_seconds']:.2f}s")
+    for name, stats in report["stages"].items():
+        print(f"   {name:<6} x{stats['workers']}: {stats['throughput_per_second']:>8.1f} items/s, "
+              f"busy {stats['busy_seconds']:.2f}s ({stats['utilization']:.0%}), "
+              f"queue avg {stats['avg_queue_depth']} / max {stats['max_queue_depth']}")
@@ -0,0 +1,230 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+
+class StackSampler:
+    """Sample the stacks of all threads into collapsed-stack counts
+
+    cProfile only records caller/callee pairs, so flame graphs are built from
+    periodic samples of sys._current_frames() instead.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _frame_name(frame) -> str:
+        code = frame.f_code
+        return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_name(frame))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def write_collapsed(self, path: str):
+        """Write Brendan Gregg collapsed format (``frame;frame;frame count``)"""
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+class WorkerProfiles:
+    """cProfile every thread started while active, for merging with the caller's profile
+
+    Before Python 3.12 a cProfile.Profile only sees the thread that enabled
+    it, so a ``threading.setprofile`` hook starts one profiler per new
+    thread. A profiler can only be switched off from its own thread, so each
+    one's timer does that on the thread's next event after ``stop``. Threads
+    that were already running when profiling started are only covered by
+    the stack samples.
+    """
+
+    def __init__(self):
+        self.profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    def _timer(self) -> float:
+        if self._stopped:
+            sys.setprofile(None)
+        return time.perf_counter()
+
+    def _bootstrap(self, frame, event, arg):
+        sys.setprofile(None)
+        if self._stopped:
+            return
+        profile = cProfile.Profile(self._timer)
+        with self._lock:
+            self.profiles.append(profile)
+        profile.enable()
+
+    def start(self):
+        threading.setprofile(self._bootstrap)
+
+    def stop(self):
+        threading.setprofile(None)
+        self._stopped = True
+
+
+class Profiler:
+    """Capture cProfile stats, tracemalloc peaks and collapsed stacks per run
+
+    Use ``with profiler.profile("query"):`` around a unit of work. Nested or
+    concurrent profile blocks are no-ops so only the outermost run is captured.
+
+    Before Python 3.12 the cProfile stats cover the calling thread and threads
+    started inside the block. Pools that already exist (the shard fan-out
+    executor, ResilientCaller executors, the QueryWorkerPool threads) are not
+    in the .prof/.txt output; their time only shows up in the .folded stack
+    samples.
+    """
+
+    def __init__(self,
+                 output_dir: str = "./profiles",
+                 top_n: int = 20,
+                 sample_interval: float = 0.005,
+                 trace_frames: int = 10):
+        self.output_dir = output_dir
+        self.top_n = top_n
+        self.sample_interval = sample_interval
+        self.trace_frames = trace_frames
+        self.reports: List[Dict[str, Any]] = []
+        self._active = False
+        self._lock = threading.Lock()
+        self._sequence = 0
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def _claim(self) -> bool:
+        with self._lock:
+            if self._active:
+                return False
+            self._active = True
+            self._sequence += 1
+            return True
+
+    @contextmanager
+    def profile(self, label: str):
+        if not self._claim():
+            yield None
+            return
+
+        started_tracing = not tracemalloc.is_tracing()
+        if not started_tracing and not hasattr(tracemalloc, "reset_peak"):
+            # reset_peak is 3.9+; on 3.8 restarting is the only way to clear the peak
+            tracemalloc.stop()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start(self.trace_frames)
+
+        sampler = StackSampler(self.sample_interval)
+        profile = cProfile.Profile()
+        # From 3.12 cProfile hooks sys.monitoring, which already covers every thread
+        workers = WorkerProfiles() if sys.version_info < (3, 12) else None
+        sampler.start()
+        start = time.perf_counter()
+        profile.enable()
+        if workers:
+            workers.start()
+        try:
+            yield profile
+        finally:
+            if workers:
+                workers.stop()
+            profile.disable()
+            wall_time = time.perf_counter() - start
+            sampler.stop()
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            try:
+                worker_profiles = workers.profiles if workers else []
+                self.reports.append(self._report(label, wall_time, profile, worker_profiles,
+                                                 sampler, peak, snapshot))
+            finally:
+                with self._lock:
+                    self._active = False
+
+    def _report(self, label, wall_time, profile, worker_profiles, sampler, peak, snapshot) -> Dict[str, Any]:
+        slug = re.sub(r"[^a-zA-Z0-9_-]+", "_", label)
+        prefix = os.path.join(self.output_dir, f"{self._sequence:03d}_{slug}")
+
+        # Worker threads are merged into the caller's stats
+        stream = io.StringIO()
+        stats = pstats.Stats(profile, *worker_profiles, stream=stream)
+        stats.dump_stats(f"{prefix}.prof")
+        sampler.write_collapsed(f"{prefix}.folded")
+        stats.sort_stats("cumulative").print_stats(self.top_n)
+        with open(f"{prefix}.txt", "w", encoding="utf-8") as file:
+            file.write(stream.getvalue())
+
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+        top_allocations = [
+            {"site": str(stat.traceback[0]), "size_bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics("lineno")[:self.top_n]
+        ]
+
+        report = {
+            "label": label,
+            "wall_time": wall_time,
+            "peak_memory_bytes": peak,
+            "top_allocations": top_allocations,
+            "samples": sum(sampler.stacks.values()),
+            "profiled_threads": 1 + len(worker_profiles),
+            "files": {
+                "cprofile": f"{prefix}.prof",
+                "stats": f"{prefix}.txt",
+                "collapsed": f"{prefix}.folded",
+            }
+        }
+        print(f"⏱️ Profiled '{label}': {wall_time:.2f}s, peak memory {peak / 1024 / 1024:.1f} MiB "
+              f"→ {prefix}.*")
+        return report
+
+    def print_summary(self):
+        """Print per-run timings and the largest allocation sites"""
+        for report in self.reports:
+            print(f"\n📈 {report['label']}: {report['wall_time']:.2f}s, "
+                  f"peak {report['peak_memory_bytes'] / 1024 / 1024:.1f} MiB")
+            for allocation in report["top_allocations"][:5]:
+                print(f"   {allocation['size_bytes'] / 1024:.1f} KiB in {allocation['count']} blocks: "
+                      f"{allocation['site']}")
@@ -2,51 +2,184 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.chains import RetrievalQA
 from langchain.prompts import PromptTemplate
 from langchain.schema import Document
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import threading
+import time
 from config import Config
 from vector_store import VectorStoreManager
+from chunk_store import ChunkStore
+from resilience import CircuitOpenError, ResilientCaller
+from resilient_clients import ResilientChatModel, ResilientEmbeddings
+from profiling import Profiler
+from adaptive_retrieval import choose_k
+from tokens import count_tokens
+from sessions import SessionStore
 
 class RAGSystem:
     """Complete RAG system using LangChain, ChromaDB, and Gemini"""
     
     def __init__(self):
+        self._created_at = time.perf_counter()  # Cold-start clock
         self.config = Config()
         self.vector_manager = VectorStoreManager()
-        self.llm = None
-        self.qa_chain = None
+        self._llm = None
+        self._qa_chain = None
+        self._init_lock = threading.RLock()
         self._initialized = False  # Track initialization state
+        self.profiler = None  # Set by enable_profiling()
+        self.startup_metrics: Dict[str, Any] = {"cold_start_to_first_answer": None}
+        self.adaptive_stats: Dict[str, Any] = {"queries": 0, "total_k": 0, "tokens_saved": 0, "reasons": {}}
+        # Multi-turn chat state; cached retrievals are dropped whenever the index changes
+        self.sessions = SessionStore()
+        self.vector_manager.add_invalidation_listener(self.sessions.invalidate_retrievals)
         
-    def initialize(self, persist_directory: str = "./chroma_db"):
-        """Initialize all components of the RAG system"""
+    def initialize(self, persist_directory: str = "./chroma_db", lazy: bool = None, warm_up: bool = None):
+        """Initialize all components of the RAG system
+        
+        In lazy mode (Config.LAZY_INIT) each component is built on first use.
+        Otherwise the embeddings client, ChromaDB client and LLM are built
+        concurrently, followed by the QA chain. ``warm_up`` primes connections
+        and loads the index before the first request.
+        """
         print("🚀 Initializing RAG System...")
+        lazy = self.config.LAZY_INIT if lazy is None else lazy
+        warm_up = self.config.WARM_UP if warm_up is None else warm_up
+        start = time.perf_counter()
         
         # Validate configuration
         self.config.validate()
         
-        # Initialize embeddings
-        self.vector_manager.initialize_embeddings()
+        self.vector_manager.configure_lazy(persist_directory)
+        if not lazy:
+            self._initialize_parallel(persist_directory)
         
-        # Initialize ChromaDB
-        self.vector_manager.initialize_chromadb(persist_directory)
+        self._initialized = True
+        self.startup_metrics["initialize_seconds"] = time.perf_counter() - start
+        print(f"✅ RAG System initialized successfully{' (lazy)' if lazy else ''}!")
+        
+        if warm_up:
+            self.warm_up()
+    
+    def initialize_serving(self, index_dir: str = None):
+        """Initialize a read-only query worker over a published memory-mapped index
         
-        # Initialize Gemini LLM
-        self._initialize_llm()
+        ChromaDB is never opened; the embeddings client and LLM are built on
+        first use, so this is safe to call before or after forking.
+        """
+        print("🚀 Initializing read-only RAG worker...")
+        self.config.validate()
+        self.vector_manager.configure_lazy()
+        self.vector_manager.open_mmap_index(index_dir)
+        self._initialized = True
+    
+    def rebuild_index(self, **hnsw_params) -> Dict[str, float]:
+        """Rebuild the collections with new HNSW parameters and drop the stale QA chain"""
+        if not self._initialized:
+            raise ValueError("RAG system not initialized. Call initialize() first.")
+        timings = self.vector_manager.rebuild_collections(**hnsw_params)
+        # The chain's retriever wraps the replaced collection; rebuild it on next use
+        with self._init_lock:
+            self.qa_chain = None
+        return timings
+    
+    def publish_index(self, index_dir: str = None) -> int:
+        """Publish the current collections as a new generation for read-only workers"""
+        if not self._initialized:
+            raise ValueError("RAG system not initialized. Call initialize() first.")
+        return self.vector_manager.publish_mmap_index(index_dir)
+    
+    def _initialize_parallel(self, persist_directory: str):
+        """Build the independent components concurrently, then the QA chain"""
+        with ThreadPoolExecutor(max_workers=3, thread_name_prefix="rag-init") as executor:
+            futures = [
+                executor.submit(self.vector_manager.initialize_embeddings),
+                executor.submit(self.vector_manager.open_client, persist_directory),
+                executor.submit(self._initialize_llm),
+            ]
+            for future in futures:
+                future.result()
         
-        # Create QA chain
+        # Both need the embeddings; the ChromaDB client is already open
+        self.vector_manager.initialize_chromadb(persist_directory)
         self._create_qa_chain()
+    
+    @property
+    def llm(self):
+        # Same publication ordering as VectorStoreManager.embeddings
+        if self._llm is None and self._initialized:
+            with self._init_lock:
+                if self._llm is None:
+                    self._initialize_llm()
+        return self._llm
+    
+    @llm.setter
+    def llm(self, value):
+        self._llm = value
+    
+    @property
+    def qa_chain(self):
+        if self._qa_chain is None and self._initialized:
+            with self._init_lock:
+                if self._qa_chain is None:
+                    self._create_qa_chain()
+        return self._qa_chain
+    
+    @qa_chain.setter
+    def qa_chain(self, value):
+        self._qa_chain = value
+    
+    def warm_up(self, include_llm: bool = False):
+        """Build every component and prime connections before the first request"""
+        if not self._initialized:
+            raise ValueError("RAG system not initialized. Call initialize() first.")
         
-        self._initialized = True
-        print("✅ RAG System initialized successfully!")
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="rag-warmup") as executor:
+            futures = [executor.submit(self.vector_manager.warm_up), executor.submit(lambda: self.qa_chain)]
+            if include_llm:
+                futures.append(executor.submit(self.llm.invoke, "ping"))
+            for future in futures:
+                future.result()
+        self.startup_metrics["warm_up_seconds"] = time.perf_counter() - start
+        print(f"🔥 Warm-up completed in {self.startup_metrics['warm_up_seconds']:.2f}s")
+    
+    def enable_profiling(self, output_dir: str = "./profiles", profiler: Profiler = None) -> Profiler:
+        """Profile every ingestion run and query (cProfile, tracemalloc, collapsed stacks)"""
+        self.profiler = profiler or Profiler(output_dir=output_dir)
+        return self.profiler
+    
+    def disable_profiling(self):
+        self.profiler = None
+    
+    def _profiled(self, label: str):
+        # nullcontext keeps the disabled path to a single attribute check
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.profile(label)
     
     def _initialize_llm(self):
         """Initialize Gemini LLM"""
+        start = time.perf_counter()
         try:
-            self.llm = ChatGoogleGenerativeAI(
+            client_kwargs = {}
+            if self.config.GOOGLE_API_ENDPOINT:
+                client_kwargs = {
+                    "client_options": {"api_endpoint": self.config.GOOGLE_API_ENDPOINT},
+                    "transport": "rest"
+                }
+            llm = ChatGoogleGenerativeAI(
                 model=self.config.LLM_MODEL,
                 google_api_key=self.config.GOOGLE_API_KEY,
                 temperature=self.config.LLM_TEMPERATURE,
-                max_output_tokens=self.config.LLM_MAX_OUTPUT_TOKENS
+                max_output_tokens=self.config.LLM_MAX_OUTPUT_TOKENS,
+                **client_kwargs
             )
+            if self.config.RESILIENCE_ENABLED:
+                llm = ResilientChatModel(inner=llm, caller=ResilientCaller("llm"))
+            self.llm = llm
+            self.startup_metrics["llm_init_seconds"] = time.perf_counter() - start
             print("✅ Gemini LLM initialized successfully")
         except Exception as e:
             raise Exception(f"Failed to initialize LLM: {e}")
@@ -76,9 +209,7 @@ Answer:"""
             self.qa_chain = RetrievalQA.from_chain_type(
                 llm=self.llm,
                 chain_type="stuff",
-                retriever=self.vector_manager.vector_store.as_retriever(
-                    search_kwargs={"k": self.config.TOP_K_RESULTS}
-                ),
+                retriever=self.vector_manager.as_retriever(self.config.TOP_K_RESULTS),
                 chain_type_kwargs={"prompt": PROMPT},
                 return_source_documents=True
             )
@@ -98,49 +229,226 @@ Answer:"""
             raise ValueError("RAG system not initialized. Call initialize() first or set auto_initialize=True.")
         
         # Now add documents
-        self.vector_manager.add_documents(documents)
+        with self._profiled("ingest"):
+            self.vector_manager.add_documents(documents)
+    
+    def add_chunk_store(self, store: ChunkStore, auto_initialize: bool = False):
+        """Add a compact ChunkStore to the vector store"""
+        if auto_initialize and not self._initialized:
+            print("⚠️  RAG system not initialized. Auto-initializing...")
+            self.initialize()
+        
+        if not self._initialized:
+            raise ValueError("RAG system not initialized. Call initialize() first or set auto_initialize=True.")
+        
+        with self._profiled("ingest"):
+            self.vector_manager.add_chunk_store(store)
+    
+    def ingest_pipelined(self, records, auto_initialize: bool = False, **pipeline_options) -> Dict[str, Any]:
+        """Ingest (text, metadata) records with overlapping split/embed/write stages"""
+        if auto_initialize and not self._initialized:
+            print("⚠️  RAG system not initialized. Auto-initializing...")
+            self.initialize()
+        
+        if not self._initialized:
+            raise ValueError("RAG system not initialized. Call initialize() first or set auto_initialize=True.")
+        
+        with self._profiled("ingest"):
+            return self.vector_manager.ingest_pipelined(records, **pipeline_options)
     
-    def query(self, question: str) -> Dict[str, Any]:
-        """Query the RAG system"""
+    def query(self,
+              question: str,
+              filter: Dict[str, Any] = None,
+              adaptive: bool = None,
+              session_id: str = None) -> Dict[str, Any]:
+        """Query the RAG system, optionally restricting retrieval with a metadata filter
+        
+        With ``adaptive`` (default Config.ADAPTIVE_RETRIEVAL) the number of
+        chunks sent to the LLM is chosen per query from the candidates' scores.
+        With ``session_id`` the question is answered in the context of that
+        chat session, and follow-ups reuse the previous turn's retrieval.
+        """
         if not self._initialized or not self.qa_chain:
             raise ValueError("RAG system not initialized. Call initialize() first.")
         
+        adaptive = self.config.ADAPTIVE_RETRIEVAL if adaptive is None else adaptive
+        session = self.sessions.get(session_id) if session_id is not None else None
+        
         try:
             print(f"❓ Processing query: {question}")
             
-            # Get response from QA chain
-            response = self.qa_chain({"query": question})
+            # Retrieve, then run the QA chain's stuff step; each stage is timed
+            with session.lock if session else nullcontext(), self._profiled("query"):
+                start = time.perf_counter()
+                retrieval = None
+                reused = session is not None and not filter and session.is_follow_up(question)
+                if reused:
+                    documents = session.last_documents
+                    print(f"♻️  Reusing {len(documents)} documents retrieved for the previous turn")
+                else:
+                    # Only retrieval needs a stable index; generation runs without the lock
+                    with self.vector_manager.index_lock.read():
+                        if adaptive:
+                            documents, retrieval = self._retrieve_adaptive(question, filter)
+                        elif filter:
+                            documents = self.vector_manager.similarity_search(
+                                question, self.config.TOP_K_RESULTS, filter=filter
+                            )
+                        else:
+                            documents = self.qa_chain.retriever.get_relevant_documents(question)
+                retrieved = time.perf_counter()
+                prompt_question = session.contextualize(question) if session else question
+                answer = self._run_chain_on_documents(prompt_question, documents)
+                finished = time.perf_counter()
+                
+                if session:
+                    session.record_turn(question, answer, documents)
+                    session.compact(
+                        self._summarize_turns,
+                        self.config.SESSION_HISTORY_TOKENS,
+                        self.config.SESSION_SUMMARY_TOKENS
+                    )
+                    session_info = {
+                        "id": session.session_id,
+                        "turn": session.turn_count,
+                        "reused_retrieval": reused,
+                        "history_tokens": session.history_tokens(),
+                        "section_ids": list(session.section_ids),
+                    }
             
             # Format the response
             result = {
                 "question": question,
-                "answer": response["result"],
+                "answer": answer,
                 "source_documents": [
                     {
                         "content": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content,
                         "metadata": doc.metadata
                     }
-                    for doc in response["source_documents"]
-                ]
+                    for doc in documents
+                ],
+                "timings": {
+                    "retrieval_seconds": round(retrieved - start, 4),
+                    "generation_seconds": round(finished - retrieved, 4),
+                    "total_seconds": round(finished - start, 4),
+                }
             }
+            if retrieval is not None:
+                result["retrieval"] = retrieval
+            if session:
+                result["session"] = session_info
+            
+            if self.startup_metrics["cold_start_to_first_answer"] is None:
+                cold_start = time.perf_counter() - self._created_at
+                self.startup_metrics["cold_start_to_first_answer"] = cold_start
+                print(f"🧊 Cold start to first answer: {cold_start:.2f}s")
             
             print("✅ Query processed successfully")
             return result
             
+        except CircuitOpenError:
+            raise
         except Exception as e:
             raise Exception(f"Failed to process query: {e}")
     
-    def get_similar_documents(self, query: str, k: int = None) -> List[Document]:
+    def _retrieve_adaptive(self, question: str, filter: Dict[str, Any] = None) -> Tuple[List[Document], Dict[str, Any]]:
+        """Fetch a candidate pool and keep the k its score distribution supports"""
+        candidates = self.vector_manager.similarity_search_with_distance(
+            question, self.config.ADAPTIVE_CANDIDATE_POOL, filter=filter
+        )
+        k, reason = choose_k(
+            [distance for _, distance in candidates],
+            self.config.ADAPTIVE_MIN_K,
+            self.config.ADAPTIVE_MAX_K,
+            self.config.ADAPTIVE_SCORE_GAP_RATIO,
+            self.config.ADAPTIVE_CUMULATIVE_RELEVANCE
+        )
+        documents = [doc for doc, _ in candidates[:k]]
+        
+        # Savings are measured against what fixed top-k would have sent
+        dropped = candidates[k:self.config.TOP_K_RESULTS]
+        tokens_saved = sum(count_tokens(doc.page_content) for doc, _ in dropped)
+        print(f"🎯 Adaptive k={k} (pool {len(candidates)}, {reason}), saved ~{tokens_saved} prompt tokens")
+        
+        stats = self.adaptive_stats
+        stats["queries"] += 1
+        stats["total_k"] += k
+        stats["tokens_saved"] += tokens_saved
+        stats["reasons"][reason] = stats["reasons"].get(reason, 0) + 1
+        
+        return documents, {"k": k, "reason": reason, "candidates": len(candidates), "tokens_saved": tokens_saved}
+    
+    def _summarize_turns(self, summary: str, turns: List[Tuple[str, str]]) -> str:
+        """Fold old chat turns into the session's running summary"""
+        transcript = "\n".join(f"User: {question}\nAssistant: {answer}" for question, answer in turns)
+        prompt = (
+            f"Update the running summary of a legal question-answering conversation in at most "
+            f"{self.config.SESSION_SUMMARY_TOKENS // 2} words. Keep act names and section numbers.\n\n"
+            f"Current summary: {summary or '(none)'}\n\nNew turns:\n{transcript}\n\nUpdated summary:"
+        )
+        try:
+            return self.llm.invoke(prompt).content.strip()
+        except Exception as e:
+            # Fall back to a plain list of the questions asked
+            print(f"⚠️  Session summary failed, keeping questions only: {e}")
+            asked = "; ".join(question for question, _ in turns)
+            return f"{summary} Earlier questions: {asked}".strip()
+    
+    def end_session(self, session_id: str) -> bool:
+        """Discard a chat session's state"""
+        return self.sessions.drop(session_id)
+    
+    def _run_chain_on_documents(self, question: str, documents: List[Document]) -> str:
+        """Run the QA chain's stuff step over already retrieved documents"""
+        output = self.qa_chain.combine_documents_chain(
+            {"input_documents": documents, "question": question}
+        )
+        return output["output_text"]
+    
+    def get_similar_documents(self, query: str, k: int = None, filter: Dict[str, Any] = None) -> List[Document]:
         """Get similar documents without LLM processing"""
         if not self._initialized:
             raise ValueError("RAG system not initialized. Call initialize() first.")
-        return self.vector_manager.similarity_search(query, k)
+        return self.vector_manager.similarity_search(query, k, filter=filter)
+    
+    def get_resilience_stats(self) -> Dict[str, Any]:
+        """Get latency percentiles, hedge/retry counters and circuit state for remote calls"""
+        # Private attributes: reading stats must not build the clients in lazy mode
+        stats = {}
+        if self._llm is None:
+            stats["llm"] = "not initialized"
+        elif isinstance(self._llm, ResilientChatModel):
+            stats["llm"] = self._llm.caller.get_stats()
+        embeddings = self.vector_manager._embeddings
+        if embeddings is None:
+            stats["embeddings"] = "not initialized"
+        elif isinstance(embeddings, ResilientEmbeddings):
+            stats["embed_query"] = embeddings.query_caller.get_stats()
+            stats["embed_documents"] = embeddings.documents_caller.get_stats()
+        return stats
+    
+    def get_startup_metrics(self) -> Dict[str, Any]:
+        """Initialization, per-component and cold-start-to-first-answer timings (seconds)"""
+        return dict(self.startup_metrics, **{
+            f"{name}_init_seconds": seconds
+            for name, seconds in self.vector_manager.init_timings.items()
+        })
+    
+    def get_adaptive_stats(self) -> Dict[str, Any]:
+        """Get average chosen k and prompt tokens saved by adaptive retrieval"""
+        stats = dict(self.adaptive_stats)
+        stats["avg_k"] = round(stats["total_k"] / stats["queries"], 2) if stats["queries"] else None
+        return stats
     
     def get_system_info(self) -> Dict[str, Any]:
         """Get information about the RAG system"""
         return {
             "initialized": self._initialized,
+            "startup": self.get_startup_metrics(),
             "vector_store_info": self.vector_manager.get_collection_info(),
+            "resilience": self.get_resilience_stats(),
+            "adaptive_retrieval": self.get_adaptive_stats(),
+            "sessions": self.sessions.get_stats(),
             "config": {
                 "embedding_model": self.config.EMBEDDING_MODEL,
                 "llm_model": self.config.LLM_MODEL,
@@ -0,0 +1,223 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+from config import Config
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open"""
+
+
+class LatencyTracker:
+    """Rolling window of call latencies with percentile lookups"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Return the p-th percentile (0-1), or None until enough samples exist"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(p * len(ordered)))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """Fail fast after repeated failures, probing again after a cool-down"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = 0.0
+        self._state = self.CLOSED
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def allow(self) -> bool:
+        """Admit a call; once half-open, only a single probe until it resolves"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.OPEN or self._probing:
+                return False
+            self._state = self.HALF_OPEN
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self._state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """Best-effort detection of rate-limit / quota errors from Google clients"""
+    if type(error).__name__ in ("ResourceExhausted", "TooManyRequests", "ServiceUnavailable"):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in ("429", "503", "resource exhausted", "quota", "rate limit"))
+
+
+class ResilientCaller:
+    """Run remote calls with adaptive timeouts, hedging, retries and circuit breaking
+
+    Per-call timeouts follow the observed p99 latency, a duplicate (hedged)
+    request is sent once a call runs past the observed p95, throttling errors
+    and timeouts are retried with exponential backoff and full jitter, and a
+    circuit breaker rejects calls outright after repeated failures.
+    """
+
+    def __init__(self,
+                 name: str,
+                 min_timeout: float = None,
+                 max_timeout: float = None,
+                 timeout_multiplier: float = None,
+                 hedge_percentile: float = None,
+                 max_retries: int = None,
+                 backoff_base: float = None,
+                 backoff_max: float = None,
+                 failure_threshold: int = None,
+                 reset_timeout: float = None,
+                 max_workers: int = 8):
+        config = Config()
+        self.name = name
+        self.min_timeout = min_timeout or config.RESILIENCE_MIN_TIMEOUT
+        self.max_timeout = max_timeout or config.RESILIENCE_MAX_TIMEOUT
+        self.timeout_multiplier = timeout_multiplier or config.RESILIENCE_TIMEOUT_MULTIPLIER
+        self.hedge_percentile = hedge_percentile or config.RESILIENCE_HEDGE_PERCENTILE
+        self.max_retries = config.RESILIENCE_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = backoff_base or config.RESILIENCE_BACKOFF_BASE
+        self.backoff_max = backoff_max or config.RESILIENCE_BACKOFF_MAX
+
+        self.latency = LatencyTracker()
+        self.breaker = CircuitBreaker(
+            failure_threshold=failure_threshold or config.RESILIENCE_FAILURE_THRESHOLD,
+            reset_timeout=reset_timeout or config.RESILIENCE_RESET_TIMEOUT
+        )
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-call")
+        self._stats = {"calls": 0, "hedges": 0, "hedge_wins": 0, "retries": 0, "timeouts": 0, "rejected": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def current_timeout(self) -> float:
+        """Timeout for the next call, derived from observed p99 latency"""
+        p99 = self.latency.percentile(0.99)
+        if p99 is None:
+            return self.max_timeout
+        return max(self.min_timeout, min(self.max_timeout, p99 * self.timeout_multiplier))
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _timed(self, fn: Callable, args, kwargs):
+        start = time.monotonic()
+        result = fn(*args, **kwargs)
+        self.latency.record(time.monotonic() - start)
+        return result
+
+    def _call_hedged(self, fn: Callable, args, kwargs):
+        timeout = self.current_timeout()
+        hedge_after = self.latency.percentile(self.hedge_percentile)
+        start = time.monotonic()
+
+        primary = self._executor.submit(self._timed, fn, args, kwargs)
+        pending = {primary}
+        if hedge_after is not None and hedge_after < timeout:
+            done, _ = wait(pending, timeout=hedge_after)
+            if not done:
+                pending.add(self._executor.submit(self._timed, fn, args, kwargs))
+                self._count("hedges")
+
+        last_error = None
+        while pending:
+            remaining = timeout - (time.monotonic() - start)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        self._count("hedge_wins")
+                    return future.result()
+                last_error = future.exception()
+
+        if last_error is not None and not pending:
+            raise last_error
+        self._count("timeouts")
+        raise TimeoutError(f"{self.name} call timed out after {timeout:.2f}s")
+
+    def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """Call fn(*args, **kwargs) through the resilience layer"""
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError(f"{self.name} circuit is open; failing fast")
+        # Retries belong to one logical call, so the breaker sees one outcome
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = self._call_hedged(fn, args, kwargs)
+            except Exception as e:
+                retryable = isinstance(e, TimeoutError) or is_throttling_error(e)
+                if not retryable or attempt == self.max_retries:
+                    self.breaker.record_failure()
+                    raise
+                self._count("retries")
+                time.sleep(self._backoff(attempt))
+            else:
+                self.breaker.record_success()
+                return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get call counters, latency percentiles and circuit state"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update({
+            "circuit": self.breaker.state,
+            "timeout": self.current_timeout(),
+            "p50": self.latency.percentile(0.5),
+            "p95": self.latency.percentile(0.95),
+            "p99": self.latency.percentile(0.99),
+        })
+        return stats
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,48 @@
+from typing import Any, List, Optional
+from langchain.chat_models.base import BaseChatModel
+from langchain.schema import BaseMessage, ChatResult
+from langchain.schema.embeddings import Embeddings
+from resilience import ResilientCaller
+
+
+class ResilientEmbeddings(Embeddings):
+    """Embeddings wrapper that routes every request through a ResilientCaller
+
+    Queries and document batches get separate callers: a batch takes far
+    longer than one query, so a shared latency window would hedge and time
+    out queries against batch latencies.
+    """
+
+    def __init__(self, inner: Embeddings, query_caller: ResilientCaller = None,
+                 documents_caller: ResilientCaller = None):
+        self.inner = inner
+        self.query_caller = query_caller or ResilientCaller("embed-query")
+        self.documents_caller = documents_caller or ResilientCaller("embed-documents")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.documents_caller.call(self.inner.embed_documents, texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.query_caller.call(self.inner.embed_query, text)
+
+
+class ResilientChatModel(BaseChatModel):
+    """Chat model wrapper that routes generation through a ResilientCaller"""
+
+    inner: BaseChatModel
+    caller: Any
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @property
+    def _llm_type(self) -> str:
+        return f"resilient-{self.inner._llm_type}"
+
+    def _generate(self,
+                  messages: List[BaseMessage],
+                  stop: Optional[List[str]] = None,
+                  run_manager: Any = None,
+                  **kwargs: Any) -> ChatResult:
+        # The run manager is not forwarded: hedged duplicates would double-report callbacks
+        return self.caller.call(self.inner._generate, messages, stop=stop, **kwargs)
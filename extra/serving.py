@@ -0,0 +1,69 @@
+import multiprocessing
+from typing import Any, Dict
+from config import Config
+
+# One RAG system per worker process, built by the pool initializer
+_worker_rag = None
+
+
+def _config_settings() -> Dict[str, Any]:
+    """Current Config values, including overrides made at runtime (e.g. from CLI flags)"""
+    return {name: value for name, value in vars(Config).items() if name.isupper()}
+
+
+def _init_worker(index_dir: str, settings: Dict[str, Any]):
+    global _worker_rag
+    # Spawned workers re-import config, so re-apply the parent's settings
+    for name, value in settings.items():
+        setattr(Config, name, value)
+    from rag_system import RAGSystem
+    _worker_rag = RAGSystem()
+    _worker_rag.initialize_serving(index_dir)
+
+
+def _worker_query(question: str) -> Dict[str, Any]:
+    try:
+        result = _worker_rag.query(question)
+        result["worker_pid"] = multiprocessing.current_process().pid
+        result["index_generation"] = _worker_rag.vector_manager.mmap_index.generation
+        return result
+    except Exception as e:
+        return {"question": question, "error": str(e)}
+
+
+class QueryWorkerPool:
+    """Process pool of read-only RAG workers sharing one memory-mapped index
+
+    Workers map the live generation published by a single writer
+    (RAGSystem.publish_index) and switch to newer generations as they appear.
+    They are started with SERVING_START_METHOD ("spawn" by default): forking a
+    parent that already runs client, executor and gRPC threads can deadlock
+    the child on locks held at fork time.
+    """
+
+    def __init__(self, index_dir: str = None, processes: int = None):
+        self.index_dir = index_dir or Config.MMAP_INDEX_DIR
+        self.processes = processes or Config.SERVING_WORKERS
+        self._pool = multiprocessing.get_context(Config.SERVING_START_METHOD).Pool(
+            processes=self.processes,
+            initializer=_init_worker,
+            initargs=(self.index_dir, _config_settings())
+        )
+        print(f"👷 Started {self.processes} query workers on {self.index_dir}")
+
+    def query(self, question: str) -> Dict[str, Any]:
+        """Answer one question on any free worker"""
+        result = self._pool.apply(_worker_query, (question,))
+        if "error" in result:
+            raise Exception(f"Failed to process query: {result['error']}")
+        return result
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
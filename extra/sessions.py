@@ -0,0 +1,183 @@
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from langchain.schema import Document
+from config import Config
+from tokens import count_tokens
+
+# Words that point back at earlier turns ("what does it say?")
+_BACK_REFERENCE = {
+    "it", "its", "this", "that", "these", "those", "they", "them", "their", "there",
+    "above", "previous", "same", "earlier", "former", "latter", "one", "ones",
+}
+# Function words and conversational filler that carry no retrieval content
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "being", "am",
+    "what", "which", "who", "whom", "whose", "why", "how", "when", "where",
+    "do", "does", "did", "can", "could", "would", "should", "will", "shall", "may", "might", "must",
+    "of", "in", "on", "at", "to", "for", "from", "by", "with", "about", "into", "under", "as",
+    "and", "or", "but", "if", "so", "then", "than", "not", "no", "yes", "ok", "okay",
+    "i", "me", "my", "you", "your", "we", "us", "please", "just", "really", "exactly", "again",
+    "tell", "explain", "elaborate", "clarify", "mean", "means", "meant", "say", "says", "said",
+    "give", "show", "more", "further", "also", "else", "detail", "details", "example", "examples",
+    "section", "provision", "rule",
+}
+_WORD = re.compile(r"[a-z0-9]+")
+_SECTION_MENTION = re.compile(r"\bsection\s+(\d+[a-z]?)\b", re.IGNORECASE)
+
+
+def content_terms(text: str) -> List[str]:
+    """Words of ``text`` that are neither stopwords nor back-references"""
+    return [word for word in _WORD.findall(text.lower())
+            if word not in _STOPWORDS and word not in _BACK_REFERENCE]
+
+
+class ChatSession:
+    """Rolling state for one multi-turn conversation
+
+    Recent turns are kept verbatim; once they exceed the history token cap the
+    oldest ones are folded into a running summary.
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.summary = ""
+        self.turns: deque = deque()
+        self.section_ids: List[Any] = []
+        self.last_documents: List[Document] = []
+        self.last_question = ""
+        self.turn_count = 0
+        self.last_used = time.monotonic()
+        # Turns of one session run one at a time
+        self.lock = threading.Lock()
+
+    def history_tokens(self) -> int:
+        return count_tokens(self.summary) + count_tokens(self._sections_text()) + sum(
+            count_tokens(question) + count_tokens(answer) for question, answer in self.turns
+        )
+
+    def _sections_text(self) -> str:
+        if not self.section_ids:
+            return ""
+        return f"Sections discussed so far: {', '.join(str(s) for s in self.section_ids)}"
+
+    def is_follow_up(self, question: str) -> bool:
+        """True for short, anaphora-dominated questions that add nothing new to retrieve
+
+        The question must point back at the previous turn, stay within
+        SESSION_FOLLOW_UP_MAX_WORDS, and contain no content words beyond
+        stopwords, the previous question's own words and sections already
+        retrieved. Anything else gets a fresh retrieval.
+        """
+        if not self.last_documents:
+            return False
+        words = _WORD.findall(question.lower())
+        if not words or len(words) > Config.SESSION_FOLLOW_UP_MAX_WORDS:
+            return False
+        if not any(word in _BACK_REFERENCE for word in words):
+            return False
+
+        known = {str(section).lower() for section in self.section_ids}
+        for number in _SECTION_MENTION.findall(question):
+            if f"section {number.lower()}" not in known:
+                return False
+        remaining = _SECTION_MENTION.sub(" ", question)
+        previous = set(content_terms(self.last_question))
+        return all(term in previous for term in content_terms(remaining))
+
+    def contextualize(self, question: str) -> str:
+        """The question prefixed with the summary and recent turns, for the QA prompt"""
+        if not self.summary and not self.turns:
+            return question
+        parts = []
+        if self.summary:
+            parts.append(f"Conversation summary: {self.summary}")
+        if self.section_ids:
+            parts.append(self._sections_text())
+        for previous_question, answer in self.turns:
+            parts.append(f"User: {previous_question}\nAssistant: {answer}")
+        parts.append(f"Follow-up question: {question}")
+        return "\n\n".join(parts)
+
+    def record_turn(self, question: str, answer: str, documents: List[Document]):
+        self.turns.append((question, answer))
+        self.turn_count += 1
+        self.last_documents = documents
+        self.last_question = question
+        # Most recently retrieved last; the oldest fall off past the cap
+        for doc in documents:
+            section = doc.metadata.get("section")
+            if section is not None:
+                if section in self.section_ids:
+                    self.section_ids.remove(section)
+                self.section_ids.append(section)
+        del self.section_ids[:-Config.SESSION_MAX_SECTIONS]
+
+    def compact(self, summarize: Callable[[str, List[Tuple[str, str]]], str],
+                max_tokens: int, summary_tokens: int):
+        """Fold the oldest turns into the summary until history fits ``max_tokens``"""
+        folded = []
+        while len(self.turns) > 1 and self.history_tokens() > max_tokens:
+            folded.append(self.turns.popleft())
+        if not folded:
+            return
+        summary = summarize(self.summary, folded)
+        # Hard cap in case the summarizer ignores its length budget
+        limit = summary_tokens * 4
+        self.summary = summary if count_tokens(summary) <= summary_tokens else summary[:limit]
+
+
+class SessionStore:
+    """Bounded LRU of chat sessions with idle expiry"""
+
+    def __init__(self, max_sessions: int = None, ttl_seconds: float = None):
+        self.max_sessions = max_sessions or Config.SESSION_MAX_SESSIONS
+        self.ttl_seconds = ttl_seconds or Config.SESSION_TTL_SECONDS
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, session_id: str) -> ChatSession:
+        """Return the session, creating it (and evicting the least recently used) if needed"""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = ChatSession(session_id)
+                self._sessions[session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_used = now
+            return session
+
+    def _evict_expired(self, now: float):
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_used < self.ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def drop(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def invalidate_retrievals(self, keys: Optional[List[Any]] = None):
+        """Forget cached retrievals after the index changes (an invalidation listener)"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.last_documents = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,114 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Set
+from langchain.schema import Document
+
+# Suffixes used by the repo's data files for different exports of the same act
+_SOURCE_SUFFIXES = ("_full", "_titles_only", "_sections", "_sample")
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from",
+    "how", "in", "is", "it", "of", "on", "or", "say", "the", "to", "under", "what", "when",
+    "which", "who", "with", "act", "section", "sections", "about", "tell", "me", "explain",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords"""
+    return [token for token in re.findall(r"[a-z0-9]+", text.lower())
+            if len(token) > 2 and token not in _STOPWORDS]
+
+
+def act_name(metadata: Dict[str, Any]) -> str:
+    """Act a chunk belongs to: its ``act`` metadata field, else its source file name"""
+    if metadata.get("act"):
+        return str(metadata["act"])
+    stem = os.path.splitext(os.path.basename(str(metadata.get("source", "documents"))))[0]
+    for suffix in _SOURCE_SUFFIXES:
+        if stem.endswith(suffix):
+            stem = stem[:-len(suffix)]
+    return stem
+
+
+def shard_collection_name(base_name: str, act: str) -> str:
+    """Chroma-safe collection name for an act shard"""
+    slug = re.sub(r"[^a-z0-9]+", "_", act.lower()).strip("_") or "default"
+    # Chroma names must end in an alphanumeric, which truncation can break
+    return f"{base_name}_{slug}"[:63].rstrip("_")
+
+
+class QueryRouter:
+    """Pick the act shards a query most likely targets via keyword/title matching
+
+    Each act is described by the tokens of its name plus the section titles
+    seen during ingestion or loaded from a titles file. Queries are scored
+    with IDF-weighted token overlap; act-name matches count double.
+    """
+
+    def __init__(self, min_score_ratio: float = 0.5, max_fanout: int = 3):
+        self.min_score_ratio = min_score_ratio
+        self.max_fanout = max_fanout
+        self._name_terms: Dict[str, Set[str]] = {}
+        self._title_terms: Dict[str, Set[str]] = {}
+
+    @property
+    def acts(self) -> List[str]:
+        return list(self._name_terms)
+
+    def add_act(self, act: str, titles: Iterable[str] = ()):
+        """Register an act and (optionally) some of its section titles"""
+        self._name_terms.setdefault(act, set(tokenize(act.replace("_", " "))))
+        terms = self._title_terms.setdefault(act, set())
+        for title in titles:
+            terms.update(tokenize(title))
+
+    def add_documents(self, act: str, documents: Iterable[Document]):
+        self.add_act(act, (doc.metadata.get("title", "") for doc in documents))
+
+    def load_titles_file(self, path: str, act: str = None):
+        """Load a titles-only JSON file such as hindu_marriage_act_titles_only.json"""
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                records = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            raise ValueError(f"Failed to load titles file {path}: {e}")
+
+        act = act or act_name({"source": path})
+        titles = [record.get("title", "") for record in records if isinstance(record, dict)]
+        self.add_act(act, titles)
+        print(f"🧭 Loaded {len(titles)} titles for act '{act}'")
+
+    def _idf(self) -> Dict[str, float]:
+        document_frequency = Counter()
+        for act in self._name_terms:
+            document_frequency.update(self._name_terms[act] | self._title_terms.get(act, set()))
+        total = len(self._name_terms)
+        return {term: math.log(1 + total / count) for term, count in document_frequency.items()}
+
+    def score(self, query: str) -> Dict[str, float]:
+        idf = self._idf()
+        tokens = set(tokenize(query))
+        scores = {}
+        for act, name_terms in self._name_terms.items():
+            title_terms = self._title_terms.get(act, set())
+            scores[act] = sum(
+                idf[token] * (2.0 if token in name_terms else 1.0)
+                for token in tokens
+                if token in name_terms or token in title_terms
+            )
+        return scores
+
+    def route(self, query: str) -> List[str]:
+        """Return the acts to search; all acts when nothing matches"""
+        scores = self.score(query)
+        if not scores:
+            return []
+        best = max(scores.values())
+        if best <= 0:
+            return list(scores)
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        selected = [act for act in ranked if scores[act] >= best * self.min_score_ratio]
+        return selected[:self.max_fanout]
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Sweep chunking and retrieval parameters against a labelled query set
+"""
+
+import argparse
+import itertools
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Tuple
+import chromadb
+import numpy as np
+from langchain.text_splitter import CharacterTextSplitter, RecursiveCharacterTextSplitter
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from config import Config
+from data_loader import JSONDataLoader
+from embedding_cache import CachedEmbeddings, EmbeddingCache
+from tokens import count_tokens
+
+# Splitter strategies by name
+SPLITTERS = {
+    "recursive": lambda size, overlap: RecursiveCharacterTextSplitter(
+        chunk_size=size, chunk_overlap=overlap, length_function=len
+    ),
+    "legal": lambda size, overlap: RecursiveCharacterTextSplitter(
+        chunk_size=size, chunk_overlap=overlap, length_function=len,
+        separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
+    ),
+    "character": lambda size, overlap: CharacterTextSplitter(
+        separator="\n", chunk_size=size, chunk_overlap=overlap, length_function=len
+    ),
+}
+
+
+class ParameterSweep:
+    """Build one index per (splitter, chunk size, overlap) and score each k against labelled queries
+
+    Embeddings go through an on-disk cache, so chunks shared between
+    configurations (and repeated sweeps) are only embedded once. Rows report
+    embedding and index-write time separately, with the cache hits behind
+    the embedding time, since a warm cache makes ingest look cheaper.
+    """
+
+    def __init__(self,
+                 records: List[Tuple[str, Dict[str, Any]]],
+                 queries: List[Dict[str, Any]],
+                 embeddings,
+                 relevance_field: str = "section"):
+        self.records = records
+        self.queries = queries
+        self.embeddings = embeddings
+        self.relevance_field = relevance_field
+        self.client = chromadb.EphemeralClient()
+        self._query_vectors = None
+
+    def _split(self, splitter_name: str, chunk_size: int, overlap: int) -> Tuple[List[str], List[Dict[str, Any]]]:
+        splitter = SPLITTERS[splitter_name](chunk_size, overlap)
+        texts, metadatas = [], []
+        for text, metadata in self.records:
+            for chunk in splitter.split_text(text):
+                texts.append(chunk)
+                metadatas.append(metadata)
+        return texts, metadatas
+
+    def _query_embeddings(self) -> List[List[float]]:
+        if self._query_vectors is None:
+            self._query_vectors = [self.embeddings.embed_query(q["query"]) for q in self.queries]
+        return self._query_vectors
+
+    def _recall(self, query: Dict[str, Any], metadatas: List[Dict[str, Any]]) -> float:
+        relevant = set(query["relevant"])
+        if not relevant:
+            return 1.0
+        found = {metadata.get(self.relevance_field) for metadata in metadatas}
+        return len(relevant & found) / len(relevant)
+
+    def evaluate(self, splitter_name: str, chunk_size: int, overlap: int, k_values: List[int]) -> List[Dict[str, Any]]:
+        """Build one index and return a result row per k"""
+        start = time.perf_counter()
+        texts, metadatas = self._split(splitter_name, chunk_size, overlap)
+        cache = getattr(self.embeddings, "cache", None)
+        hits_before, misses_before = (cache.hits, cache.misses) if cache else (0, 0)
+        embed_start = time.perf_counter()
+        vectors = self.embeddings.embed_documents(texts)
+        embed_seconds = time.perf_counter() - embed_start
+        cache_stats = {
+            "cache_hits": cache.hits - hits_before if cache else None,
+            "cache_misses": cache.misses - misses_before if cache else None,
+        }
+
+        write_start = time.perf_counter()
+        collection = self.client.create_collection(f"sweep_{uuid.uuid4().hex[:12]}")
+        ids = [str(i) for i in range(len(texts))]
+        for batch_start in range(0, len(ids), 500):
+            batch = slice(batch_start, batch_start + 500)
+            collection.add(
+                ids=ids[batch],
+                embeddings=vectors[batch],
+                metadatas=[{k: v for k, v in m.items() if v is not None} for m in metadatas[batch]],
+                documents=texts[batch]
+            )
+        write_seconds = time.perf_counter() - write_start
+        ingest_seconds = time.perf_counter() - start
+
+        dimension = len(vectors[0]) if vectors else 0
+        index_size = {
+            "chunks": len(texts),
+            "text_bytes": sum(len(text.encode("utf-8")) for text in texts),
+            "vector_bytes": len(texts) * dimension * 4,
+        }
+
+        rows = []
+        query_vectors = self._query_embeddings()
+        for k in k_values:
+            latencies, recalls, prompt_tokens = [], [], []
+            for query, query_vector in zip(self.queries, query_vectors):
+                query_start = time.perf_counter()
+                result = collection.query(query_embeddings=[query_vector], n_results=min(k, len(texts)))
+                latencies.append(time.perf_counter() - query_start)
+                recalls.append(self._recall(query, result["metadatas"][0]))
+                prompt_tokens.append(sum(count_tokens(doc) for doc in result["documents"][0]))
+
+            rows.append({
+                "splitter": splitter_name,
+                "chunk_size": chunk_size,
+                "chunk_overlap": overlap,
+                "k": k,
+                **index_size,
+                "ingest_seconds": round(ingest_seconds, 3),
+                "embed_seconds": round(embed_seconds, 3),
+                "write_seconds": round(write_seconds, 3),
+                **cache_stats,
+                "retrieval_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+                "retrieval_p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 2),
+                "avg_prompt_tokens": round(float(np.mean(prompt_tokens)), 1),
+                "recall_at_k": round(float(np.mean(recalls)), 3),
+            })
+
+        self.client.delete_collection(collection.name)
+        return rows
+
+    def run(self,
+            splitters: List[str],
+            chunk_sizes: List[int],
+            overlaps: List[int],
+            k_values: List[int]) -> List[Dict[str, Any]]:
+        """Evaluate the full grid, skipping overlaps that are not smaller than the chunk size"""
+        results = []
+        for splitter_name, chunk_size, overlap in itertools.product(splitters, chunk_sizes, overlaps):
+            if overlap >= chunk_size:
+                continue
+            print(f"🔧 {splitter_name} chunk_size={chunk_size} overlap={overlap}")
+            results.extend(self.evaluate(splitter_name, chunk_size, overlap, k_values))
+        return results
+
+
+def pick_cheapest(results: List[Dict[str, Any]], recall_target: float) -> Dict[str, Any]:
+    """Cheapest setting (prompt tokens, then retrieval latency) that meets the recall target"""
+    passing = [row for row in results if row["recall_at_k"] >= recall_target]
+    if not passing:
+        return {}
+    return min(passing, key=lambda row: (row["avg_prompt_tokens"], row["retrieval_p50_ms"], row["chunks"]))
+
+
+def print_results(results: List[Dict[str, Any]]):
+    header = f"{'splitter':<10} {'size':>5} {'ovl':>4} {'k':>3} {'chunks':>6} {'embed_s':>7} " \
+             f"{'write_s':>7} {'hits':>6} {'p50_ms':>7} {'tokens':>7} {'recall':>6}"
+    print("\n📊 Sweep results:")
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        hits = "-" if row["cache_hits"] is None else row["cache_hits"]
+        print(f"{row['splitter']:<10} {row['chunk_size']:>5} {row['chunk_overlap']:>4} {row['k']:>3} "
+              f"{row['chunks']:>6} {row['embed_seconds']:>7.2f} {row['write_seconds']:>7.2f} {hits:>6} "
+              f"{row['retrieval_p50_ms']:>7.2f} {row['avg_prompt_tokens']:>7.1f} {row['recall_at_k']:>6.3f}")
+
+
+def main():
+    config = Config()
+    parser = argparse.ArgumentParser(description="Sweep chunking and retrieval parameters")
+    parser.add_argument("--json-file", required=True, help="Path to JSON dataset file")
+    parser.add_argument("--queries", required=True,
+                        help='Labelled queries JSON: [{"query": "...", "relevant": ["Section 7"]}, ...]')
+    parser.add_argument("--text-fields", nargs="+", help="Specific text fields to extract (optional)")
+    parser.add_argument("--metadata-fields", nargs="+", default=["section"], help="Metadata fields to include")
+    parser.add_argument("--relevance-field", default="section", help="Metadata field the labels refer to")
+    parser.add_argument("--chunk-sizes", nargs="+", type=int, default=[500, config.CHUNK_SIZE, 1500])
+    parser.add_argument("--overlaps", nargs="+", type=int, default=[100, config.CHUNK_OVERLAP, 300])
+    parser.add_argument("--k", nargs="+", type=int, default=[1, 3, config.TOP_K_RESULTS, 8])
+    parser.add_argument("--splitters", nargs="+", choices=sorted(SPLITTERS), default=["recursive", "legal"])
+    parser.add_argument("--recall-target", type=float, default=0.9, help="Quality bar for recall@k")
+    parser.add_argument("--cache", default="./embedding_cache.sqlite3", help="Embedding cache file")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    config.validate()
+
+    loader = JSONDataLoader(args.json_file)
+    records = list(loader.iter_records(args.text_fields, args.metadata_fields))
+    with open(args.queries, "r", encoding="utf-8") as file:
+        queries = json.load(file)
+    print(f"📚 {len(records)} records, {len(queries)} labelled queries")
+
+    cache = EmbeddingCache(args.cache, model=config.EMBEDDING_MODEL)
+    embeddings = CachedEmbeddings(
+        GoogleGenerativeAIEmbeddings(model=config.EMBEDDING_MODEL, google_api_key=config.GOOGLE_API_KEY),
+        cache
+    )
+
+    sweep = ParameterSweep(records, queries, embeddings, relevance_field=args.relevance_field)
+    results = sweep.run(args.splitters, args.chunk_sizes, args.overlaps, args.k)
+    print_results(results)
+    print(f"\n💾 Embedding cache: {cache.hits} hits, {cache.misses} misses")
+
+    best = pick_cheapest(results, args.recall_target)
+    if best:
+        print(f"\n🏆 Cheapest setting with recall@k >= {args.recall_target}: "
+              f"{best['splitter']} chunk_size={best['chunk_size']} overlap={best['chunk_overlap']} k={best['k']} "
+              f"({best['avg_prompt_tokens']} prompt tokens, recall {best['recall_at_k']})")
+    else:
+        print(f"\n⚠️  No setting reached recall@k >= {args.recall_target}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"results": results, "best": best}, file, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test script for the compact chunk store and its text arena
+"""
+
+from chunk_store import ChunkStore, TextArena
+
+
+def test_arena_interleaved_appends():
+    """Reads between appends return the right spans and keep few segments"""
+
+    print("🧪 Testing text arena with interleaved appends and reads")
+    print("=" * 50)
+
+    arena = TextArena()
+    spans = []
+    for i in range(5000):
+        text = f"record {i};"
+        spans.append((arena.append(text), len(text), text))
+        # Every append is followed by a read, the worst case for compaction
+        offset, length, expected = spans[i // 2]
+        assert arena.slice(offset, length) == expected
+
+    print(f"📊 {len(arena)} chars in {arena.num_segments} segments")
+    for offset, length, expected in spans:
+        assert arena.slice(offset, length) == expected
+    assert arena.num_segments <= 20
+    assert arena.slice(len(arena), 5) == ""
+
+
+def test_split_and_batches():
+    """Chunks are spans into the source text and come back as Documents"""
+
+    print("\n🧪 Testing chunk store splitting")
+    print("=" * 50)
+
+    class WordSplitter:
+        def split_text(self, text):
+            words = text.split()
+            return [" ".join(words[i:i + 3]) for i in range(0, len(words), 3)]
+
+    class RewritingSplitter:
+        def split_text(self, text):
+            return [text.upper()]
+
+    store = ChunkStore()
+    store.add_document("one two three four five six seven", {"section": "Section 1"})
+    store.add_document("alpha beta gamma delta", {"section": "Section 2", "act": "HMA"})
+    chunks = store.split(WordSplitter())
+    print(f"📊 {store.get_stats()}")
+
+    assert chunks == 5
+    assert [store.chunk_text(i) for i in range(chunks)] == [
+        "one two three", "four five six", "seven", "alpha beta gamma", "delta"
+    ]
+    assert store.chunk_document(3).metadata == {"section": "Section 2", "act": "HMA"}
+    batches = list(store.iter_batches(batch_size=2))
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+    # Rewritten chunks cannot be located in the source and are stored themselves
+    store.split(RewritingSplitter())
+    assert store.chunk_text(1) == "ALPHA BETA GAMMA DELTA"
+    assert store.document_text(0) == "one two three four five six seven"
+
+
+if __name__ == "__main__":
+    test_arena_interleaved_appends()
+    test_split_and_batches()
+    print("\n✅ All tests completed!")
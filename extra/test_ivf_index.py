@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for the IVF index: recall per nprobe, removal and re-clustering
+"""
+
+import numpy as np
+from ivf_index import IVFIndex
+
+
+def _clustered(count: int, dimension: int = 16, centers: int = 32, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    means = rng.normal(scale=4.0, size=(centers, dimension))
+    labels = rng.integers(0, centers, size=count)
+    return (means[labels] + rng.normal(size=(count, dimension))).astype(np.float32)
+
+
+def _trained_index(vectors: np.ndarray, space: str = "l2") -> IVFIndex:
+    index = IVFIndex(space=space, n_lists=32, nprobe=4)
+    index.add([str(i) for i in range(len(vectors))], vectors, train=False)
+    index.train()
+    return index
+
+
+def test_recall_by_nprobe():
+    """Recall grows with nprobe and is exact when every list is probed"""
+
+    print("🧪 Testing IVF recall by nprobe")
+    print("=" * 50)
+
+    vectors = _clustered(4000)
+    index = _trained_index(vectors)
+    queries = vectors[:50] + 0.05
+    rows = index.evaluate(queries, k=10, nprobes=[1, 4, 32])
+    recalls = [row["recall_at_k"] for row in rows]
+    for row in rows:
+        print(f"  📈 nprobe={row['nprobe']:>2} recall@10={row['recall_at_k']:.3f}")
+
+    assert recalls[0] <= recalls[1] <= recalls[2]
+    assert recalls[1] >= 0.8
+    assert recalls[2] == 1.0
+
+
+def test_removal():
+    """Removed vectors are never returned, before and after re-clustering"""
+
+    print("\n🧪 Testing IVF removal")
+    print("=" * 50)
+
+    vectors = _clustered(2000, seed=1)
+    index = _trained_index(vectors, space="cosine")
+    removed = [str(i) for i in range(0, 2000, 2)]
+    index.remove(removed)
+    print(f"  🗑️  {index.get_info()}")
+    assert len(index) == 1000
+
+    for i in (0, 10, 20):
+        found = [chunk_id for chunk_id, _ in index.search(vectors[i], 5, nprobe=32)]
+        assert str(i) not in found
+        assert index.exact_search(vectors[i + 1], 1)[0][0] == str(i + 1)
+
+    # Re-clustering compacts the tombstones away
+    assert index.needs_recluster()
+    assert index.maybe_recluster()
+    info = index.get_info()
+    print(f"  🧮 {info}")
+    assert info["tombstones"] == 0 and info["vectors"] == 1000
+    assert index.exact_search(vectors[3], 1)[0][0] == "3"
+
+
+def test_changes_during_training_survive_the_swap():
+    """Appends and removals made between the snapshot and the swap are kept"""
+
+    print("\n🧪 Testing IVF changes during training")
+    print("=" * 50)
+
+    vectors = _clustered(3000, seed=2)
+    index = _trained_index(vectors[:2000])
+    original_build = index._build
+
+    def build_with_concurrent_writes(*args, **kwargs):
+        result = original_build(*args, **kwargs)
+        index.add([str(i) for i in range(2000, 3000)], vectors[2000:], train=False)
+        index.remove(["0", "1"])
+        return result
+
+    index._build = build_with_concurrent_writes
+    index.train()
+    index._build = original_build
+
+    info = index.get_info()
+    print(f"  🧮 {info}")
+    assert info["vectors"] == 2998 and info["tombstones"] == 0
+    assert index.exact_search(vectors[2500], 1)[0][0] == "2500"
+    assert "0" not in {chunk_id for chunk_id, _ in index.exact_search(vectors[0], 5)}
+
+
+if __name__ == "__main__":
+    test_recall_by_nprobe()
+    test_removal()
+    test_changes_during_training_survive_the_swap()
+    print("\n✅ All tests completed!")
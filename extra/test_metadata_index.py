@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script for metadata filter evaluation
+"""
+
+from metadata_index import MetadataIndex
+
+
+def _index() -> MetadataIndex:
+    index = MetadataIndex()
+    index.add(
+        ["a", "b", "c", "d", "e", "f"],
+        [
+            {"section": "Section 9", "act": "HMA"},
+            {"section": "Section 13", "act": "HMA"},
+            {"section": 13, "act": "SMA"},
+            {"section": "Section 13B", "act": "HMA"},
+            {"section": "Section 14", "act": "SMA"},
+            {"section": "Preamble", "act": "HMA"},
+        ]
+    )
+    return index
+
+
+def test_range_filters():
+    """Ranges compare numerically across int and string values, 13B after 13"""
+
+    print("🧪 Testing range filters")
+    print("=" * 50)
+
+    index = _index()
+    matches = index.evaluate({"section": {"$gte": 9, "$lte": 13}})
+    print(f"  📐 9 <= section <= 13: {sorted(matches)}")
+    assert matches == {"a", "b", "c"}
+    assert index.evaluate({"section": {"$gt": 13}}) == {"d", "e"}
+    assert index.evaluate({"section": {"$gte": 13, "$lt": 14}}) == {"b", "c", "d"}
+    assert index.evaluate({"section": {"$gte": "13A", "$lte": "Section 13B"}}) == {"d"}
+    assert index.evaluate({"section": {"$lt": 9}}) == set()
+
+
+def test_in_filters():
+    """$in and $nin match listed values exactly"""
+
+    print("\n🧪 Testing $in filters")
+    print("=" * 50)
+
+    index = _index()
+    matches = index.evaluate({"section": {"$in": ["Section 13", 13]}})
+    print(f"  📋 section in ['Section 13', 13]: {sorted(matches)}")
+    assert matches == {"b", "c"}
+    assert index.evaluate({"act": {"$nin": ["HMA"]}}) == {"c", "e"}
+    assert index.to_chroma_where({"section": {"$in": ["Section 99"]}}) is None
+
+
+def test_or_filters():
+    """$or unions its clauses and combines with sibling conditions"""
+
+    print("\n🧪 Testing $or filters")
+    print("=" * 50)
+
+    index = _index()
+    where = {"$or": [{"section": "Preamble"}, {"section": {"$gte": 14}}]}
+    matches = index.evaluate(where)
+    print(f"  🔀 {where}: {sorted(matches)}")
+    assert matches == {"e", "f"}
+    assert index.evaluate({"act": "HMA", "$or": [{"section": 13}, {"section": "Section 9"}]}) == {"a"}
+
+
+if __name__ == "__main__":
+    test_range_filters()
+    test_in_filters()
+    test_or_filters()
+    print("\n✅ All tests completed!")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test script for publishing, searching and switching memory-mapped index generations
+"""
+
+import os
+import tempfile
+from mmap_index import MmapIndex, MmapIndexWriter, read_current
+
+
+def _batches(sections):
+    """One batch with a one-hot vector per section, so each query has an exact match"""
+    ids = [f"chunk-{number}" for number in sections]
+    vectors = [[1.0 if i == position else 0.0 for i in range(len(sections))]
+               for position in range(len(sections))]
+    texts = [f"Text of section {number}" for number in sections]
+    metadatas = [{"section": f"Section {number}"} for number in sections]
+    yield ids, vectors, texts, metadatas
+
+
+def test_generation_lifecycle():
+    """Publish, search, switch to a newer generation and prune the old one"""
+
+    print("🧪 Testing index generation lifecycle")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as root:
+        writer = MmapIndexWriter(root, keep=1)
+        first = writer.publish(_batches([5, 7, 9]))
+        assert read_current(root) == f"gen-{first:06d}"
+
+        # refresh_interval=0 checks CURRENT on every search
+        index = MmapIndex(root, refresh_interval=0)
+        document, distance = index.search([0.0, 1.0, 0.0], 1)[0]
+        print(f"  🔍 generation {index.generation}: {document.metadata} at {distance:.3f}")
+        assert index.generation == first and index.count == 3
+        assert document.metadata == {"section": "Section 7"}
+        assert document.page_content == "Text of section 7"
+        assert abs(distance) < 1e-6
+
+        second = writer.publish(_batches([11, 12, 13, 14]))
+        document, _ = index.search([0.0, 0.0, 0.0, 1.0], 1)[0]
+        print(f"  🔁 generation {index.generation}: {document.metadata}")
+        assert second == first + 1
+        assert index.generation == second and index.count == 4
+        assert document.metadata == {"section": "Section 14"}
+
+        # Only the last ``keep`` generations stay on disk
+        generations = sorted(name for name in os.listdir(root) if name.startswith("gen-"))
+        print(f"  🧹 on disk: {generations}")
+        assert generations == [f"gen-{second:06d}"]
+
+
+if __name__ == "__main__":
+    test_generation_lifecycle()
+    print("\n✅ All tests completed!")
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test script for the resilience layer against the local fake Gemini server
+"""
+
+import time
+from langchain.schema import HumanMessage
+from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+from fake_gemini_server import FakeGeminiServer
+from resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+from resilient_clients import ResilientChatModel, ResilientEmbeddings
+
+
+def _client_kwargs(server: FakeGeminiServer) -> dict:
+    """Point a Gemini client at the fake server, as GOOGLE_API_ENDPOINT does"""
+    return {
+        "google_api_key": "test-key",
+        "client_options": {"api_endpoint": server.url},
+        "transport": "rest"
+    }
+
+
+def _embeddings(server: FakeGeminiServer, caller: ResilientCaller) -> ResilientEmbeddings:
+    inner = GoogleGenerativeAIEmbeddings(model="models/embedding-001", **_client_kwargs(server))
+    return ResilientEmbeddings(inner, query_caller=caller, documents_caller=caller)
+
+
+def _chat_model(server: FakeGeminiServer, caller: ResilientCaller) -> ResilientChatModel:
+    # The client's own retries are turned off so only the resilience layer retries
+    inner = ChatGoogleGenerativeAI(model="gemini-pro", max_retries=1, **_client_kwargs(server))
+    return ResilientChatModel(inner=inner, caller=caller)
+
+
+def test_hedging_and_retries():
+    """Slow responses get hedged and throttling errors get retried"""
+
+    print("🧪 Testing hedging and retries")
+    print("=" * 50)
+
+    # Every 25th request is slow and every 10th is throttled, so the p95 the
+    # hedge waits for stays at normal latency and each run behaves the same
+    server = FakeGeminiServer(latency=0.01, slow_every=25, slow_latency=0.5, error_every=10).start()
+    caller = ResilientCaller(
+        "fake-llm",
+        min_timeout=0.2,
+        max_timeout=2.0,
+        max_retries=4,
+        backoff_base=0.01,
+        backoff_max=0.05,
+        failure_threshold=50
+    )
+    llm = _chat_model(server, caller)
+
+    try:
+        start_time = time.time()
+        answers = [llm.invoke([HumanMessage(content=f"question {i}")]).content for i in range(200)]
+        elapsed = time.time() - start_time
+    finally:
+        server.stop()
+
+    stats = caller.get_stats()
+    print(f"✅ {len(answers)} answers in {elapsed:.2f} seconds")
+    print(f"📊 Stats: {stats}")
+
+    assert len(answers) == 200
+    assert all(answer == "Fake answer from the local test server." for answer in answers)
+    assert stats["retries"] > 0
+    assert stats["hedges"] > 0
+    assert stats["circuit"] == CircuitBreaker.CLOSED
+
+
+def test_circuit_breaker():
+    """A failing backend opens the circuit and later calls fail fast"""
+
+    print("\n🧪 Testing circuit breaker")
+    print("=" * 50)
+
+    server = FakeGeminiServer(latency=0.01, error_rate=1.0, error_status=500).start()
+    caller = ResilientCaller("fake-embeddings", max_retries=0, failure_threshold=3, reset_timeout=60)
+    embeddings = _embeddings(server, caller)
+
+    failures = 0
+    rejected = 0
+    try:
+        for _ in range(10):
+            try:
+                embeddings.embed_query("hello")
+            except CircuitOpenError:
+                rejected += 1
+            except Exception:
+                failures += 1
+    finally:
+        server.stop()
+
+    print(f"❌ Backend failures: {failures}")
+    print(f"⛔ Rejected by open circuit: {rejected}")
+
+    assert failures == 3
+    assert rejected == 7
+
+
+def test_retries_count_as_one_failure():
+    """A call that exhausts its retries is a single failure to the breaker"""
+
+    print("\n🧪 Testing one breaker failure per call")
+    print("=" * 50)
+
+    server = FakeGeminiServer(latency=0.01, error_rate=1.0, error_status=429).start()
+    caller = ResilientCaller("fake-embeddings", max_retries=3, backoff_base=0.01, backoff_max=0.02,
+                             failure_threshold=2, reset_timeout=60)
+    embeddings = _embeddings(server, caller)
+
+    try:
+        for _ in range(2):
+            try:
+                embeddings.embed_documents(["hello", "world"])
+            except CircuitOpenError:
+                raise AssertionError("circuit opened before two calls had failed")
+            except Exception:
+                pass
+    finally:
+        server.stop()
+
+    stats = caller.get_stats()
+    print(f"📊 Stats: {stats}")
+
+    assert stats["retries"] == 6
+    assert stats["circuit"] == CircuitBreaker.OPEN
+
+
+def test_half_open_single_probe():
+    """After the cool-down exactly one probe goes through until it resolves"""
+
+    print("\n🧪 Testing half-open probe")
+    print("=" * 50)
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not any(breaker.allow() for _ in range(5))
+
+    # A failed probe re-opens the circuit for another cool-down
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert all(breaker.allow() for _ in range(5))
+    print("✅ One probe admitted per cool-down")
+
+
+if __name__ == "__main__":
+    test_hedging_and_retries()
+    test_circuit_breaker()
+    test_retries_count_as_one_failure()
+    test_half_open_single_probe()
+    print("\n✅ All tests completed!")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for chat session follow-up detection and the session store
+"""
+
+from langchain.schema import Document
+from config import Config
+from sessions import ChatSession, SessionStore
+from tokens import count_tokens
+
+
+def _session_after(question: str, section: str) -> ChatSession:
+    session = ChatSession("test")
+    session.record_turn(question, "answer", [Document(page_content="text", metadata={"section": section})])
+    return session
+
+
+def test_follow_ups_reuse_retrieval():
+    """Short questions that only point back at the previous turn reuse its documents"""
+
+    print("🧪 Testing follow-up detection (reuse)")
+    print("=" * 50)
+
+    session = _session_after("What is Saptapadi ceremony?", "Section 7")
+    follow_ups = [
+        "Tell me more about it",
+        "What does that mean?",
+        "Can you explain this further?",
+        "Give an example of that",
+        "What does Section 7 say about it?",
+        "Why is that?",
+        "Saptapadi? Explain it",
+    ]
+    for question in follow_ups:
+        print(f"  ↩️  {question}")
+        assert session.is_follow_up(question), question
+
+
+def test_new_questions_retrieve_again():
+    """Questions with new content terms, new sections or no back-reference get a fresh retrieval"""
+
+    print("\n🧪 Testing follow-up detection (fresh retrieval)")
+    print("=" * 50)
+
+    session = _session_after("What is Saptapadi ceremony?", "Section 7")
+    new_questions = [
+        "What are the grounds that allow divorce?",
+        "What is the punishment for bigamy and is it cognizable?",
+        "Is registration of marriage mandatory in such states?",
+        "Is it mandatory?",
+        "Is that ceremony mandatory?",
+        "What does Section 13 say about it?",
+        "What is judicial separation?",
+        "Tell me more about it and how it compares with the registration rules under other acts",
+    ]
+    for question in new_questions:
+        print(f"  🔍 {question}")
+        assert not session.is_follow_up(question), question
+
+    # Nothing to reuse before the first turn
+    assert not ChatSession("empty").is_follow_up("Tell me more about it")
+
+
+def test_store_is_bounded():
+    """The least recently used session is evicted once the store is full"""
+
+    print("\n🧪 Testing session store eviction")
+    print("=" * 50)
+
+    store = SessionStore(max_sessions=2, ttl_seconds=3600)
+    store.get("a")
+    store.get("b")
+    store.get("a")
+    store.get("c")
+    stats = store.get_stats()
+    print(f"📊 Stats: {stats}")
+
+    assert stats["sessions"] == 2
+    assert stats["evictions"] == 1
+    # "b" was least recently used when "c" arrived
+    assert not store.drop("b")
+    assert store.drop("a")
+
+
+def test_sections_are_bounded_and_counted():
+    """The sections list keeps the most recent ones and counts toward history tokens"""
+
+    print("\n🧪 Testing discussed-sections cap")
+    print("=" * 50)
+
+    session = ChatSession("sections")
+    for number in range(Config.SESSION_MAX_SECTIONS + 10):
+        documents = [Document(page_content="text", metadata={"section": f"Section {number}"}),
+                     Document(page_content="text", metadata={"section": "Section 0"})]
+        session.record_turn(f"question {number}", "answer", documents)
+    print(f"  📚 {len(session.section_ids)} sections kept, latest {session.section_ids[-2:]}")
+
+    assert len(session.section_ids) == Config.SESSION_MAX_SECTIONS
+    # Re-retrieved sections stay; ones not seen recently are dropped
+    assert session.section_ids[-1] == "Section 0"
+    assert "Section 1" not in session.section_ids
+
+    turn_tokens = sum(count_tokens(question) + count_tokens(answer) for question, answer in session.turns)
+    assert session.history_tokens() > turn_tokens
+    assert "Section 0" in session.contextualize("And then?")
+
+
+if __name__ == "__main__":
+    test_follow_ups_reuse_retrieval()
+    test_new_questions_retrieve_again()
+    test_store_is_bounded()
+    test_sections_are_bounded_and_counted()
+    print("\n✅ All tests completed!")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for the JSON watcher's record diffing
+"""
+
+import json
+import os
+import tempfile
+from watcher import JSONWatcher
+
+
+class _RecordingManager:
+    def __init__(self):
+        self.calls = []
+
+    def replace_records(self, source, store, keys):
+        texts = [store.document_text(doc_id) for doc_id in range(store.num_documents)]
+        self.calls.append((keys, texts))
+        return len(texts)
+
+
+class _FakeRAG:
+    def __init__(self):
+        self.vector_manager = _RecordingManager()
+
+
+def _write(path: str, data):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+    # Make sure the watcher sees a new mtime even on coarse filesystem clocks
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 1))
+
+
+def _watcher(data):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "act.json")
+    _write(path, data)
+    rag = _FakeRAG()
+    watcher = JSONWatcher(rag, [path])
+    watcher.snapshot()
+    return watcher, path, rag.vector_manager.calls
+
+
+def test_insert_modify_delete():
+    """Only inserted, modified and deleted records are re-indexed, keyed by their own section"""
+
+    print("🧪 Testing watcher diffing by section")
+    print("=" * 50)
+
+    records = [
+        {"section": "Section 12", "text": "Voidable marriages"},
+        {"section": "Section 13", "text": "Divorce"},
+        # Later records of the shipped act use section_number instead
+        {"section_number": "14", "content": "No petition within one year"},
+        {"section_number": "15", "content": "Remarriage of divorced persons"},
+    ]
+    watcher, path, calls = _watcher(records)
+
+    # Insert 13A before 14: positions shift, but nothing after it is re-indexed
+    records.insert(2, {"section": "Section 13A", "text": "Alternate relief"})
+    _write(path, records)
+    assert watcher.check_file(path) == 1
+    keys, texts = calls[-1]
+    print(f"  ➕ insert: {keys}")
+    assert keys == [{"section": "Section 13A"}]
+    assert len(texts) == 1 and "Alternate relief" in texts[0]
+
+    # Modify a section_number record
+    records[4]["content"] = "Remarriage of divorced persons (amended)"
+    _write(path, records)
+    assert watcher.check_file(path) == 1
+    keys, _ = calls[-1]
+    print(f"  ✏️  modify: {keys}")
+    assert keys == [{"section_number": "15"}]
+
+    # Delete a record
+    del records[0]
+    _write(path, records)
+    assert watcher.check_file(path) == 1
+    keys, texts = calls[-1]
+    print(f"  ➖ delete: {keys}")
+    assert keys == [{"section": "Section 12"}]
+    assert texts == []
+
+    # No None value ever reaches a where clause
+    assert all(value is not None for keys, _ in calls for key in keys for value in key.values())
+
+
+def test_keyless_and_repeated_keys():
+    """Records without a key fall back to position; repeated group keys add position"""
+
+    print("\n🧪 Testing watcher fallback keys")
+    print("=" * 50)
+
+    watcher, path, calls = _watcher({"Chapter II": [{"text": "a"}, {"text": "b"}]})
+    _write(path, {"Chapter II": [{"text": "a"}, {"text": "b changed"}]})
+    assert watcher.check_file(path) == 1
+    keys, _ = calls[-1]
+    print(f"  🔑 grouped: {keys}")
+    assert keys == [{"section": "Chapter II", "index": 1}]
+
+    watcher, path, calls = _watcher([{"text": "a"}, {"text": "b"}])
+    _write(path, [{"text": "a changed"}, {"text": "b"}])
+    assert watcher.check_file(path) == 1
+    keys, _ = calls[-1]
+    print(f"  🔑 keyless: {keys}")
+    assert keys == [{"index": 0}]
+
+
+if __name__ == "__main__":
+    test_insert_modify_delete()
+    test_keyless_and_repeated_keys()
+    print("\n✅ All tests completed!")
@@ -0,0 +1,12 @@
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _ENCODING = None
+
+
+def count_tokens(text: str) -> int:
+    """Approximate prompt tokens (tiktoken if installed, else ~4 characters per token)"""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return max(1, len(text) // 4)
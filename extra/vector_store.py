@@ -4,49 +4,342 @@ from langchain.vectorstores import Chroma
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
-from typing import List
+from langchain.schema.retriever import BaseRetriever
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import threading
+import time
+import uuid
+import numpy as np
 from config import Config
+from chunk_store import ChunkStore
+from resilience import CircuitOpenError
+from resilient_clients import ResilientEmbeddings
+from sharding import QueryRouter, act_name, shard_collection_name
+from metadata_index import MetadataIndex
+from pipeline import IngestionPipeline
+from mmap_index import MmapIndex, MmapIndexWriter
+from ivf_index import IVFIndex
+from rwlock import ReadWriteLock
+
+# Metadata key recording which collection a chunk lives in (metadata index only)
+COLLECTION_KEY = "_collection"
+# Suffix of the temporary collection a rebuild copies into before the swap
+REBUILD_SUFFIX = "__rebuild"
+
+
+def hnsw_metadata(space: str = None, m: int = None, construction_ef: int = None, search_ef: int = None) -> Dict[str, Any]:
+    """Chroma collection metadata for the configured (or given) HNSW parameters"""
+    return {
+        "hnsw:space": space or Config.HNSW_SPACE,
+        "hnsw:M": m or Config.HNSW_M,
+        "hnsw:construction_ef": construction_ef or Config.HNSW_CONSTRUCTION_EF,
+        "hnsw:search_ef": search_ef or Config.HNSW_SEARCH_EF,
+    }
+
+
+def vector_distances(query: np.ndarray, vectors: np.ndarray, space: str = "l2") -> np.ndarray:
+    """Distances matching Chroma's definitions for the given hnsw:space"""
+    if space == "cosine":
+        norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+        return 1.0 - (vectors @ query) / np.where(norms == 0, 1.0, norms)
+    if space == "ip":
+        return 1.0 - vectors @ query
+    difference = vectors - query
+    return np.einsum("ij,ij->i", difference, difference)
+
+
+class SearchRetriever(BaseRetriever):
+    """LangChain retriever over any ``search(query, k) -> documents`` callable
+
+    Used for the search paths Chroma's own retriever knows nothing about:
+    act shards, the IVF index and memory-mapped generations.
+    """
+
+    search: Callable[[str, int], List[Document]]
+    k: int = 5
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(self, query: str, *, run_manager: Any = None) -> List[Document]:
+        return self.search(query, self.k)
+
 
 class VectorStoreManager:
     """Manage ChromaDB vector store operations"""
     
     def __init__(self):
         self.config = Config()
-        self.embeddings = None
-        self.vector_store = None
+        # Lazy mode: components are built on first access (see configure_lazy)
+        self._lazy = False
+        self._persist_directory = "./chroma_db"
+        self._init_lock = threading.RLock()
+        self.init_timings: Dict[str, float] = {}
+        self._embeddings = None
+        self._vector_store = None
+        self.client = None
+        self._client_path = None
+        # Per-act collections, used when Config.SHARDING_ENABLED is set
+        self.shards: Dict[str, Chroma] = {}
+        self.router = QueryRouter(
+            min_score_ratio=self.config.SHARD_ROUTER_MIN_SCORE_RATIO,
+            max_fanout=self.config.SHARD_MAX_FANOUT
+        )
+        self._fanout_executor = None
+        # Pre-filter index over chunk metadata, keyed by chunk id
+        self.metadata_index = MetadataIndex()
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=self.config.CHUNK_SIZE,
             chunk_overlap=self.config.CHUNK_OVERLAP,
             length_function=len,
         )
+        # Readers (searches) share the index; record swaps take it exclusively
+        self.index_lock = ReadWriteLock()
+        self._invalidation_listeners: List[Callable[[List[Any]], None]] = []
+        # Read-only serving: searches go to a memory-mapped generation instead of Chroma
+        self.mmap_index: Optional[MmapIndex] = None
+        # Clustered ANN index over the default collection (Config.VECTOR_INDEX == "ivf")
+        self.ivf_index: Optional[IVFIndex] = None
         
+    def configure_lazy(self, persist_directory: str = "./chroma_db"):
+        """Defer building embeddings and ChromaDB until they are first used"""
+        self._persist_directory = persist_directory
+        self._lazy = True
+    
+    @property
+    def embeddings(self):
+        # Double-checked lazy init: the first None check runs without the lock,
+        # so every initialize_* method assigns its public attribute as its very
+        # last step. A reader that sees it non-None then also sees everything
+        # built before it (the resilience wrapper, shards, metadata/IVF indexes).
+        if self._embeddings is None and self._lazy:
+            with self._init_lock:
+                if self._embeddings is None:
+                    self.initialize_embeddings()
+        return self._embeddings
+    
+    @embeddings.setter
+    def embeddings(self, value):
+        self._embeddings = value
+    
+    @property
+    def vector_store(self):
+        if self._vector_store is None and self._lazy:
+            with self._init_lock:
+                if self._vector_store is None:
+                    self.initialize_chromadb(self._persist_directory)
+        return self._vector_store
+    
+    @vector_store.setter
+    def vector_store(self, value):
+        self._vector_store = value
+    
+    def open_client(self, persist_directory: str = "./chroma_db"):
+        """Open the ChromaDB client (independent of embeddings, so it can run in parallel)"""
+        with self._init_lock:
+            if self.client is None or self._client_path != persist_directory:
+                start = time.perf_counter()
+                self.client = chromadb.PersistentClient(path=persist_directory)
+                self._client_path = persist_directory
+                self.init_timings["chroma_client"] = time.perf_counter() - start
+            return self.client
+    
+    def warm_up(self):
+        """Prime the embeddings connection and load every collection's index into memory"""
+        self.embeddings.embed_query("warm-up")
+        for vector_store in self._stores():
+            collection = vector_store._collection
+            sample = collection.peek(1)
+            if sample["ids"]:
+                # Querying forces Chroma to load the HNSW segment
+                collection.query(query_embeddings=[sample["embeddings"][0]], n_results=1)
+    
     def initialize_embeddings(self):
         """Initialize Gemini embeddings"""
+        start = time.perf_counter()
         try:
-            self.embeddings = GoogleGenerativeAIEmbeddings(
+            client_kwargs = {}
+            if self.config.GOOGLE_API_ENDPOINT:
+                client_kwargs = {
+                    "client_options": {"api_endpoint": self.config.GOOGLE_API_ENDPOINT},
+                    "transport": "rest"
+                }
+            embeddings = GoogleGenerativeAIEmbeddings(
                 model=self.config.EMBEDDING_MODEL,
-                google_api_key=self.config.GOOGLE_API_KEY
+                google_api_key=self.config.GOOGLE_API_KEY,
+                **client_kwargs
             )
+            if self.config.RESILIENCE_ENABLED:
+                embeddings = ResilientEmbeddings(embeddings)
+            self.embeddings = embeddings
+            self.init_timings["embeddings"] = time.perf_counter() - start
             print("✅ Gemini embeddings initialized successfully")
         except Exception as e:
             raise Exception(f"Failed to initialize embeddings: {e}")
     
     def initialize_chromadb(self, persist_directory: str = "./chroma_db"):
         """Initialize ChromaDB client"""
+        start = time.perf_counter()
         try:
-            # Initialize ChromaDB client
-            client = chromadb.PersistentClient(path=persist_directory)
+            # Initialize ChromaDB client (reused if already opened)
+            client = self.open_client(persist_directory)
+            self._recover_rebuilds()
             
             # Initialize vector store
-            self.vector_store = Chroma(
+            vector_store = Chroma(
                 client=client,
                 collection_name=self.config.CHROMADB_COLLECTION_NAME,
                 embedding_function=self.embeddings,
+                collection_metadata=self._new_collection_metadata(self.config.CHROMADB_COLLECTION_NAME),
             )
+            
+            if self.config.SHARDING_ENABLED:
+                self._discover_shards()
+                for titles_file in self.config.SHARD_TITLES_FILES:
+                    self.router.load_titles_file(titles_file)
+            self._load_metadata_index(list(self.shards.values()) if self.config.SHARDING_ENABLED else [vector_store])
+            if self.config.VECTOR_INDEX == "ivf":
+                if self.config.SHARDING_ENABLED:
+                    print("⚠️  IVF index is not used with act sharding; searching shards with HNSW")
+                else:
+                    self.ivf_index = self._load_ivf_index(vector_store)
+            
+            self.vector_store = vector_store
+            self.init_timings["chromadb"] = time.perf_counter() - start
             print("✅ ChromaDB initialized successfully")
         except Exception as e:
             raise Exception(f"Failed to initialize ChromaDB: {e}")
     
+    def _new_collection_metadata(self, name: str, extra: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """HNSW metadata for a collection about to be created, None if it already exists
+        
+        Chroma fixes the index parameters at creation; passing metadata for an
+        existing collection would overwrite it without changing the index.
+        """
+        if name in {collection.name for collection in self.client.list_collections()}:
+            return None
+        return dict(extra or {}, **hnsw_metadata())
+    
+    def _load_metadata_index(self, stores: List[Chroma], page_size: int = 1000):
+        """Build the metadata index from chunks already in the collections"""
+        for vector_store in stores:
+            collection = vector_store._collection
+            offset = 0
+            while True:
+                page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+                if not page["ids"]:
+                    break
+                self._index_metadata(vector_store, page["ids"], page["metadatas"])
+                offset += len(page["ids"])
+        if len(self.metadata_index):
+            print(f"🗃️  Indexed metadata for {len(self.metadata_index)} existing chunks")
+    
+    def _load_ivf_index(self, vector_store: Chroma, page_size: int = 1000) -> IVFIndex:
+        """Build an IVF index from vectors already stored in the default collection"""
+        collection = vector_store._collection
+        space = (collection.metadata or {}).get("hnsw:space", "l2")
+        ivf_index = IVFIndex(space=space)
+        offset = 0
+        while True:
+            page = collection.get(include=["embeddings"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            # Train once at the end rather than as the threshold is crossed
+            ivf_index.add(page["ids"], page["embeddings"], train=False)
+            offset += len(page["ids"])
+        if ivf_index.ready_to_train():
+            ivf_index.train()
+        print(f"🧮 IVF index holds {len(ivf_index)} existing chunks")
+        return ivf_index
+    
+    def _index_vectors(self, vector_store: Chroma, ids: List[str], embeddings: List[List[float]] = None):
+        """Append new chunks to the IVF index (training happens later, outside the index lock)"""
+        if self.ivf_index is None or vector_store is not self.vector_store or not ids:
+            return
+        if embeddings is None:
+            rows = vector_store._collection.get(ids=ids, include=["embeddings"])
+            ids, embeddings = rows["ids"], rows["embeddings"]
+        self.ivf_index.add(ids, embeddings, train=False)
+    
+    def _maybe_recluster_ivf(self):
+        """Train or re-cluster the IVF index once writes have released the index lock
+        
+        IVFIndex trains on a snapshot under its own lock, so searches keep
+        running against the old lists until the new ones are swapped in.
+        """
+        ivf_index = self.ivf_index
+        if ivf_index is not None:
+            ivf_index.maybe_recluster()
+    
+    def _index_metadata(self, vector_store: Chroma, ids: List[str], metadatas: List[Dict[str, Any]]):
+        name = vector_store._collection.name
+        self.metadata_index.add(
+            ids,
+            [dict(metadata or {}, **{COLLECTION_KEY: name}) for metadata in metadatas]
+        )
+    
+    def _recover_rebuilds(self):
+        """Finish or discard collection rebuilds interrupted by a crash
+        
+        The original is only deleted once the copy is complete, so a leftover
+        copy without its original is finished and takes the original's name;
+        a copy next to its original was interrupted mid-copy and is dropped.
+        """
+        names = {collection.name for collection in self.client.list_collections()}
+        for name in names:
+            if not name.endswith(REBUILD_SUFFIX):
+                continue
+            original = name[:-len(REBUILD_SUFFIX)]
+            if original in names:
+                self.client.delete_collection(name)
+                print(f"🧹 Discarded unfinished rebuild of {original}")
+            else:
+                self.client.get_collection(name).modify(name=original)
+                print(f"♻️  Completed interrupted rebuild of {original}")
+    
+    def _discover_shards(self):
+        """Register act shards persisted by earlier runs"""
+        prefix = f"{self.config.CHROMADB_COLLECTION_NAME}_"
+        for collection in self.client.list_collections():
+            if collection.name.startswith(prefix) and not collection.name.endswith(REBUILD_SUFFIX):
+                act = (collection.metadata or {}).get("act", collection.name[len(prefix):])
+                self._shard_store(act)
+        if self.shards:
+            print(f"🗂️  Found {len(self.shards)} act shards: {', '.join(self.shards)}")
+    
+    def _shard_store(self, act: str) -> Chroma:
+        """Get or create the collection for one act"""
+        if act not in self.shards:
+            name = shard_collection_name(self.config.CHROMADB_COLLECTION_NAME, act)
+            self.shards[act] = Chroma(
+                client=self.client,
+                collection_name=name,
+                embedding_function=self.embeddings,
+                collection_metadata=self._new_collection_metadata(name, {"act": act}),
+            )
+            self.router.add_act(act)
+        return self.shards[act]
+    
+    def _store_for(self, metadata: Dict[str, Any]) -> Chroma:
+        if self.config.SHARDING_ENABLED:
+            return self._shard_store(act_name(metadata))
+        return self.vector_store
+    
+    def _stores(self) -> List[Chroma]:
+        if self.config.SHARDING_ENABLED:
+            return list(self.shards.values())
+        return [self.vector_store]
+    
+    def _add_split_documents(self, split_docs: List[Document]) -> None:
+        """Write chunks to the default collection or to their act shards"""
+        if not split_docs:
+            return
+        # Embed outside the index lock; only the write itself excludes searches
+        embeddings = self.embeddings.embed_documents([doc.page_content for doc in split_docs])
+        self.write_embedded(split_docs, embeddings)
+    
     def add_documents(self, documents: List[Document]) -> None:
         """Add documents to the vector store"""
         if not self.vector_store:
@@ -58,35 +351,318 @@ class VectorStoreManager:
             print(f"📄 Split {len(documents)} documents into {len(split_docs)} chunks")
             
             # Add to vector store
-            self.vector_store.add_documents(split_docs)
+            self._add_split_documents(split_docs)
             print(f"✅ Successfully added {len(split_docs)} document chunks to vector store")
             
         except Exception as e:
             raise Exception(f"Failed to add documents to vector store: {e}")
     
-    def similarity_search(self, query: str, k: int = None) -> List[Document]:
-        """Perform similarity search"""
+    def add_chunk_store(self, store: ChunkStore, batch_size: int = None) -> None:
+        """Add a ChunkStore to the vector store, building Documents batch by batch"""
         if not self.vector_store:
+            raise ValueError("Vector store not initialized. Call initialize_chromadb first.")
+        
+        batch_size = batch_size or self.config.INGEST_BATCH_SIZE
+        
+        try:
+            if not store.is_split:
+                store.split(self.text_splitter)
+            print(f"📄 Split {store.num_documents} documents into {store.num_chunks} chunks")
+            
+            # Documents only exist for one batch at a time
+            for batch in store.iter_batches(batch_size):
+                self._add_split_documents(batch)
+            print(f"✅ Successfully added {store.num_chunks} document chunks to vector store")
+            
+        except Exception as e:
+            raise Exception(f"Failed to add documents to vector store: {e}")
+    
+    def add_invalidation_listener(self, listener: Callable[[List[Any]], None]) -> None:
+        """Register a callback invoked with the changed record keys after a swap"""
+        self._invalidation_listeners.append(listener)
+    
+    def _notify_index_changed(self, keys: List[Any]) -> None:
+        for listener in self._invalidation_listeners:
+            try:
+                listener(keys)
+            except Exception as e:
+                print(f"⚠️  Cache invalidation listener failed: {e}")
+    
+    def _record_chunk_ids(self, vector_store: Chroma, source: str, key: Dict[str, Any]) -> List[str]:
+        """Find the ids of all chunks indexed for one source record, named by ``key`` field values"""
+        if not key or any(value is None for value in key.values()):
+            # Chroma rejects None in a where clause, and an empty key would match the whole file
+            raise ValueError(f"Invalid record key {key!r}")
+        collection = vector_store._collection
+        result = collection.get(
+            where={"$and": [{"source": source}] + [{field: value} for field, value in key.items()]},
+            include=[]
+        )
+        return result["ids"]
+    
+    def write_embedded(self, documents: List[Document], embeddings: List[List[float]]) -> List[str]:
+        """Write already-embedded chunks to their collections and index their metadata
+        
+        Takes the index write lock, so searches never see the collections,
+        metadata index, IVF lists and shard router out of step.
+        """
+        with self.index_lock.write():
+            ids = self._write_embedded(documents, embeddings)
+        self._maybe_recluster_ivf()
+        return ids
+    
+    def _write_embedded(self, documents: List[Document], embeddings: List[List[float]]) -> List[str]:
+        # Callers hold index_lock.write(), which is not re-entrant
+        additions: Dict[int, Tuple[Chroma, List[int]]] = {}
+        for i, doc in enumerate(documents):
+            target = self._store_for(doc.metadata)
+            additions.setdefault(id(target), (target, []))[1].append(i)
+        
+        all_ids = []
+        for target, indexes in additions.values():
+            new_ids = [str(uuid.uuid4()) for _ in indexes]
+            metadatas = [documents[i].metadata for i in indexes]
+            target._collection.add(
+                ids=new_ids,
+                embeddings=[embeddings[i] for i in indexes],
+                metadatas=metadatas,
+                documents=[documents[i].page_content for i in indexes]
+            )
+            self._index_metadata(target, new_ids, metadatas)
+            self._index_vectors(target, new_ids, [embeddings[i] for i in indexes])
+            if self.config.SHARDING_ENABLED:
+                self.router.add_documents(act_name(metadatas[0]), [documents[i] for i in indexes])
+            all_ids.extend(new_ids)
+        return all_ids
+    
+    def ingest_pipelined(self, records, **pipeline_options) -> Dict[str, Any]:
+        """Ingest (text, metadata) records through the staged load/split/embed/write pipeline"""
+        if not self.vector_store:
+            raise ValueError("Vector store not initialized. Call initialize_chromadb first.")
+        
+        report = IngestionPipeline(self, **pipeline_options).run(records)
+        print(f"✅ Successfully added {report['chunks']} document chunks to vector store")
+        return report
+    
+    def replace_records(self, source: str, store: ChunkStore, keys: List[Dict[str, Any]]) -> int:
+        """Re-index the given records of a source file
+        
+        ``store`` holds the new versions of changed and added records, and
+        ``keys`` names every changed, added or removed record as a dict of
+        metadata field values (e.g. ``{"section": "13A"}``). New chunks
+        are embedded before taking the index lock, so searches only wait for
+        the final add/delete swap. Returns the number of chunks written.
+        """
+        if not self.vector_store:
+            raise ValueError("Vector store not initialized. Call initialize_chromadb first.")
+        
+        try:
+            if not store.is_split:
+                store.split(self.text_splitter)
+            
+            documents = list(store.iter_documents())
+            texts = [doc.page_content for doc in documents]
+            embeddings = self.embeddings.embed_documents(texts) if texts else []
+            
+            removals = []
+            for vector_store in self._stores():
+                ids = []
+                for key in keys:
+                    ids.extend(self._record_chunk_ids(vector_store, source, key))
+                if ids:
+                    removals.append((vector_store, ids))
+            
+            with self.index_lock.write():
+                self._write_embedded(documents, embeddings)
+                for vector_store, ids in removals:
+                    vector_store._collection.delete(ids=ids)
+                    self.metadata_index.remove(ids)
+                    if self.ivf_index is not None:
+                        self.ivf_index.remove(ids)
+            
+            removed = sum(len(ids) for _, ids in removals)
+            print(f"🔄 Re-indexed {len(keys)} records from {source} "
+                  f"({len(texts)} new chunks, {removed} removed)")
+        except Exception as e:
+            raise Exception(f"Failed to replace records in vector store: {e}")
+        
+        self._maybe_recluster_ivf()
+        self._notify_index_changed(list(keys))
+        return len(texts)
+    
+    def _exact_search(self,
+                      query_embedding: List[float],
+                      candidate_ids: List[str],
+                      k: int,
+                      stores: List[Chroma]) -> List[tuple]:
+        """Brute-force search over a small pre-filtered candidate set"""
+        by_name = {store._collection.name: store for store in stores}
+        grouped: Dict[str, List[str]] = {}
+        for chunk_id in candidate_ids:
+            name = self.metadata_index.metadata(chunk_id).get(COLLECTION_KEY)
+            if name in by_name:
+                grouped.setdefault(name, []).append(chunk_id)
+        
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        results = []
+        for name, ids in grouped.items():
+            collection = by_name[name]._collection
+            rows = collection.get(ids=ids, include=["embeddings", "documents", "metadatas"])
+            if not rows["ids"]:
+                continue
+            space = (collection.metadata or {}).get("hnsw:space", "l2")
+            distances = vector_distances(query_vector, np.asarray(rows["embeddings"], dtype=np.float32), space)
+            for i in np.argsort(distances)[:k]:
+                results.append((
+                    Document(page_content=rows["documents"][i], metadata=rows["metadatas"][i]),
+                    float(distances[i])
+                ))
+        return heapq.nsmallest(k, results, key=lambda pair: pair[1])
+    
+    def _filtered_search_by_vector(self,
+                                   query_embedding: List[float],
+                                   k: int,
+                                   filter: Dict[str, Any],
+                                   stores: List[Chroma]) -> List[tuple]:
+        """Resolve a filter against the metadata index, then search only matching chunks"""
+        candidates = self.metadata_index.evaluate(filter)
+        names = {store._collection.name for store in stores}
+        candidates = [
+            chunk_id for chunk_id in candidates
+            if self.metadata_index.metadata(chunk_id).get(COLLECTION_KEY) in names
+        ]
+        if not candidates:
+            print("🔍 Filter matched no chunks")
+            return []
+        
+        if len(candidates) <= self.config.FILTER_EXACT_SEARCH_LIMIT:
+            print(f"🔍 Filter narrowed search to {len(candidates)} candidate chunks")
+            return self._exact_search(query_embedding, candidates, k, stores)
+        
+        # Large candidate sets go through the ANN index with the filter pushed down
+        where = self.metadata_index.to_chroma_where(filter)
+        results = []
+        for store in stores:
+            results.extend(store.similarity_search_by_vector_with_relevance_scores(
+                query_embedding, k=k, filter=where
+            ))
+        return heapq.nsmallest(k, results, key=lambda pair: pair[1])
+    
+    def _search_with_score(self, query: str, k: int, filter: Optional[Dict[str, Any]] = None) -> List[tuple]:
+        if self.mmap_index is not None:
+            if filter:
+                raise ValueError("Metadata filters are not supported when serving from a memory-mapped index")
+            return self.mmap_index.search(self.embeddings.embed_query(query), k)
+        if self.ivf_index is not None and not filter:
+            return self._ivf_search(query, k)
+        if self.config.SHARDING_ENABLED:
+            return self.sharded_search_with_score(query, k, filter=filter)
+        if not filter:
+            with self.index_lock.read():
+                return self.vector_store.similarity_search_with_score(query, k=k)
+        query_embedding = self.embeddings.embed_query(query)
+        with self.index_lock.read():
+            return self._filtered_search_by_vector(query_embedding, k, filter, [self.vector_store])
+    
+    def _ivf_search(self, query: str, k: int) -> List[tuple]:
+        """Probe the nearest IVF lists, then fetch the winning chunks from Chroma"""
+        query_embedding = self.embeddings.embed_query(query)
+        with self.index_lock.read():
+            pairs = self.ivf_index.search(query_embedding, k)
+            if not pairs:
+                return []
+            rows = self.vector_store._collection.get(
+                ids=[chunk_id for chunk_id, _ in pairs], include=["documents", "metadatas"]
+            )
+        by_id = {
+            chunk_id: Document(page_content=text, metadata=metadata or {})
+            for chunk_id, text, metadata in zip(rows["ids"], rows["documents"], rows["metadatas"])
+        }
+        return [(by_id[chunk_id], distance) for chunk_id, distance in pairs if chunk_id in by_id]
+    
+    def sharded_search_with_score(self,
+                                  query: str,
+                                  k: int = None,
+                                  acts: List[str] = None,
+                                  filter: Dict[str, Any] = None) -> List[tuple]:
+        """Search the routed act shards in parallel and merge the top-k by distance"""
+        k = k or self.config.TOP_K_RESULTS
+        # The router's term tables and the shard map change under the write lock
+        with self.index_lock.read():
+            acts = [act for act in (acts or self.router.route(query)) if act in self.shards]
+        if not acts:
+            return []
+        
+        # Embed once and reuse the vector for every shard
+        query_embedding = self.embeddings.embed_query(query)
+        
+        if filter:
+            with self.index_lock.read():
+                return self._filtered_search_by_vector(
+                    query_embedding, k, filter, [self.shards[act] for act in acts]
+                )
+        
+        if self._fanout_executor is None:
+            self._fanout_executor = ThreadPoolExecutor(
+                max_workers=self.config.SHARD_MAX_FANOUT,
+                thread_name_prefix="shard-search"
+            )
+        
+        with self.index_lock.read():
+            futures = [
+                self._fanout_executor.submit(
+                    self.shards[act].similarity_search_by_vector_with_relevance_scores,
+                    query_embedding,
+                    k=k
+                )
+                for act in acts
+            ]
+            results = [pair for future in futures for pair in future.result()]
+        
+        print(f"🧭 Routed query to {len(acts)} shard(s): {', '.join(acts)}")
+        return heapq.nsmallest(k, results, key=lambda pair: pair[1])
+    
+    def as_retriever(self, k: int = None):
+        """Retriever for the QA chain; fans out over shards when sharding is enabled"""
+        k = k or self.config.TOP_K_RESULTS
+        if self.mmap_index is not None:
+            return SearchRetriever(search=self.similarity_search, k=k)
+        # Resolved first: in lazy mode this is what loads the IVF index
+        vector_store = self.vector_store
+        if self.ivf_index is not None or self.config.SHARDING_ENABLED:
+            return SearchRetriever(search=self.similarity_search, k=k)
+        return vector_store.as_retriever(search_kwargs={"k": k})
+    
+    def similarity_search(self, query: str, k: int = None, filter: Dict[str, Any] = None) -> List[Document]:
+        """Perform similarity search, optionally restricted by a metadata filter"""
+        if self.mmap_index is None and not self.vector_store:
             raise ValueError("Vector store not initialized")
         
         k = k or self.config.TOP_K_RESULTS
         
         try:
-            results = self.vector_store.similarity_search(query, k=k)
+            if self.config.SHARDING_ENABLED or filter or self.mmap_index is not None or self.ivf_index is not None:
+                results = [doc for doc, _ in self._search_with_score(query, k, filter)]
+            else:
+                with self.index_lock.read():
+                    results = self.vector_store.similarity_search(query, k=k)
             print(f"🔍 Found {len(results)} similar documents for query")
             return results
+        except CircuitOpenError:
+            # Callers fail fast on this, so it must not be wrapped
+            raise
         except Exception as e:
             raise Exception(f"Failed to perform similarity search: {e}")
     
-    def similarity_search_with_score(self, query: str, k: int = None) -> List[tuple]:
-        """Perform similarity search with relevance scores"""
-        if not self.vector_store:
+    def similarity_search_with_score(self, query: str, k: int = None, filter: Dict[str, Any] = None) -> List[tuple]:
+        """Perform similarity search with relevance scores, optionally restricted by a metadata filter"""
+        if self.mmap_index is None and not self.vector_store:
             raise ValueError("Vector store not initialized")
         
         k = k or self.config.TOP_K_RESULTS
         
         try:
-            results = self.vector_store.similarity_search_with_score(query, k=k)
+            results = self._search_with_score(query, k, filter)
             # Filter by similarity threshold
             filtered_results = [
                 (doc, score) for doc, score in results 
@@ -94,20 +670,162 @@ class VectorStoreManager:
             ]
             print(f"🔍 Found {len(filtered_results)} relevant documents (score >= {self.config.SIMILARITY_THRESHOLD})")
             return filtered_results
+        except CircuitOpenError:
+            raise
         except Exception as e:
             raise Exception(f"Failed to perform similarity search with scores: {e}")
     
+    def similarity_search_with_distance(self, query: str, k: int = None, filter: Dict[str, Any] = None) -> List[tuple]:
+        """Raw (document, distance) pairs, closest first, with no similarity threshold applied"""
+        if self.mmap_index is None and not self.vector_store:
+            raise ValueError("Vector store not initialized")
+        
+        k = k or self.config.TOP_K_RESULTS
+        
+        try:
+            results = sorted(self._search_with_score(query, k, filter), key=lambda pair: pair[1])
+            print(f"🔍 Found {len(results)} candidate documents for query")
+            return results
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to perform similarity search with distances: {e}")
+    
+    def publish_mmap_index(self, root: str = None) -> int:
+        """Snapshot every collection into a new memory-mapped generation and make it live
+        
+        Stored vectors are copied as-is, so nothing is re-embedded.
+        """
+        root = root or self.config.MMAP_INDEX_DIR
+        stores = self._stores()
+        space = (stores[0]._collection.metadata or {}).get("hnsw:space", "l2")
+        
+        def batches():
+            batch_size = self.config.MMAP_EXPORT_BATCH_SIZE
+            for vector_store in stores:
+                collection = vector_store._collection
+                for offset in range(0, collection.count(), batch_size):
+                    rows = collection.get(
+                        include=["embeddings", "documents", "metadatas"],
+                        limit=batch_size,
+                        offset=offset
+                    )
+                    yield rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"]
+        
+        start = time.perf_counter()
+        try:
+            # Hold off record swaps so the generation is a consistent snapshot
+            with self.index_lock.read():
+                generation = MmapIndexWriter(root).publish(batches(), space=space)
+        except Exception as e:
+            raise Exception(f"Failed to publish memory-mapped index: {e}")
+        print(f"🗺️  Published index generation {generation} to {root} "
+              f"in {time.perf_counter() - start:.2f}s")
+        return generation
+    
+    def open_mmap_index(self, root: str = None) -> MmapIndex:
+        """Serve searches from the live memory-mapped generation (read-only mode)"""
+        self.mmap_index = MmapIndex(root or self.config.MMAP_INDEX_DIR)
+        return self.mmap_index
+    
+    def rebuild_collections(self, batch_size: int = 1000, **hnsw_params) -> Dict[str, float]:
+        """Re-create every collection with new HNSW parameters from its stored vectors
+        
+        Keyword arguments override Config (space, m, construction_ef,
+        search_ef). Nothing is re-embedded; each collection is copied into a
+        new one, which then replaces the original under its name. A crash
+        mid-rebuild is recovered on the next start (see _recover_rebuilds).
+        Cached retrievers still point at the old collections; RAGSystem's
+        rebuild_index drops them.
+        """
+        metadata = hnsw_metadata(**hnsw_params)
+        timings = {}
+        try:
+            for vector_store in self._stores():
+                start = time.perf_counter()
+                old = vector_store._collection
+                temp_name = f"{old.name}{REBUILD_SUFFIX}"
+                if temp_name in {collection.name for collection in self.client.list_collections()}:
+                    self.client.delete_collection(temp_name)
+                
+                # Non-index metadata (e.g. the shard's act) carries over
+                new_metadata = {key: value for key, value in (old.metadata or {}).items()
+                                if not key.startswith("hnsw:")}
+                new_metadata.update(metadata)
+                rebuilt = self.client.create_collection(temp_name, metadata=new_metadata)
+                
+                # Bulk copy under the read lock so searches keep running
+                with self.index_lock.read():
+                    for offset in range(0, old.count(), batch_size):
+                        rows = old.get(include=["embeddings", "documents", "metadatas"],
+                                       limit=batch_size, offset=offset)
+                        rebuilt.add(ids=rows["ids"], embeddings=rows["embeddings"],
+                                    documents=rows["documents"], metadatas=rows["metadatas"])
+                
+                # Writes may have landed since the copy; chunk ids are never
+                # reused, so diffing the id sets under the write lock catches
+                # them all before the swap
+                with self.index_lock.write():
+                    self._copy_delta(old, rebuilt, batch_size)
+                    name = old.name
+                    self.client.delete_collection(name)
+                    rebuilt.modify(name=name)
+                    self._reopen_store(vector_store, name)
+                    if self.ivf_index is not None and name == self.config.CHROMADB_COLLECTION_NAME:
+                        # The distance space may have changed
+                        self.ivf_index = self._load_ivf_index(self.vector_store)
+                
+                timings[name] = time.perf_counter() - start
+                print(f"🔁 Rebuilt {name} ({rebuilt.count()} chunks) with {metadata} "
+                      f"in {timings[name]:.2f}s")
+        except Exception as e:
+            raise Exception(f"Failed to rebuild collections: {e}")
+        return timings
+    
+    @staticmethod
+    def _copy_delta(source, target, batch_size: int) -> None:
+        """Make target hold exactly the ids in source, copying only the difference"""
+        source_ids = set(source.get(include=[])["ids"])
+        target_ids = set(target.get(include=[])["ids"])
+        stale = list(target_ids - source_ids)
+        missing = list(source_ids - target_ids)
+        for offset in range(0, len(stale), batch_size):
+            target.delete(ids=stale[offset:offset + batch_size])
+        for offset in range(0, len(missing), batch_size):
+            rows = source.get(ids=missing[offset:offset + batch_size],
+                              include=["embeddings", "documents", "metadatas"])
+            target.add(ids=rows["ids"], embeddings=rows["embeddings"],
+                       documents=rows["documents"], metadatas=rows["metadatas"])
+    
+    def _reopen_store(self, vector_store: Chroma, name: str):
+        """Point the LangChain wrapper for a rebuilt collection at the new one"""
+        reopened = Chroma(client=self.client, collection_name=name, embedding_function=self.embeddings)
+        if vector_store is self.vector_store:
+            self.vector_store = reopened
+        for act, shard in self.shards.items():
+            if shard is vector_store:
+                self.shards[act] = reopened
+    
     def get_collection_info(self) -> dict:
         """Get information about the current collection"""
+        if self.mmap_index is not None:
+            return {"mmap_index": self.mmap_index.get_info()}
         if not self.vector_store:
             return {"error": "Vector store not initialized"}
         
         try:
             collection = self.vector_store._collection
-            return {
+            info = {
                 "name": collection.name,
                 "count": collection.count(),
                 "metadata": collection.metadata
             }
+            if self.ivf_index is not None:
+                info["ivf"] = self.ivf_index.get_info()
+            if self.config.SHARDING_ENABLED:
+                info["shards"] = {
+                    act: store._collection.count() for act, store in self.shards.items()
+                }
+            return info
         except Exception as e:
             return {"error": f"Failed to get collection info: {e}"}
\ No newline at end of file
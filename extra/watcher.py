@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from chunk_store import ChunkStore
+from data_loader import JSONDataLoader
+
+
+# Record fields that identify a record, tried in order after the id field
+RECORD_KEY_FIELDS = ("section", "section_number")
+
+
+def watch_metadata_fields(metadata_fields: List[str] = None) -> List[str]:
+    """Metadata fields to ingest with so watched records can be found by key later"""
+    fields = list(metadata_fields or [])
+    return fields + [field for field in RECORD_KEY_FIELDS if field not in fields]
+
+
+class JSONWatcher:
+    """Watch JSON source files and live-reindex records that changed
+
+    Each record is keyed by its own ``id_field`` (stored as ``id`` metadata),
+    else by its ``section`` or ``section_number``, so inserting a record does
+    not re-key the ones after it. Position is only used for records with no
+    key, and to tell apart records whose key repeats (e.g. ``section`` naming
+    the group in a dict of arrays). Only changed, added and removed records
+    are re-split, re-embedded and swapped into the collection; ingest with
+    ``watch_metadata_fields`` so the stored chunks carry the key fields.
+    """
+
+    def __init__(self,
+                 rag_system,
+                 json_files: List[str],
+                 text_fields: List[str] = None,
+                 metadata_fields: List[str] = None,
+                 id_field: str = None,
+                 interval: float = 2.0):
+        self.rag = rag_system
+        self.json_files = list(json_files)
+        self.text_fields = text_fields
+        self.metadata_fields = watch_metadata_fields(metadata_fields)
+        self.id_field = id_field
+        self.interval = interval
+
+        self._mtimes: Dict[str, float] = {}
+        self._snapshots: Dict[str, Dict[Tuple, str]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _record_key(self, metadata: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+        """((field, value),) naming one record; never contains a None value"""
+        fields = (("id",) if self.id_field else ()) + RECORD_KEY_FIELDS
+        for field in fields:
+            if metadata.get(field) is not None:
+                return ((field, metadata[field]),)
+        return (("index", metadata.get("index")),) if metadata.get("index") is not None else ()
+
+    @staticmethod
+    def _fingerprint(text: str, metadata: Dict[str, Any]) -> str:
+        # Position is left out so inserting a record doesn't dirty everything after it
+        stable = {key: value for key, value in metadata.items() if key != "index"}
+        payload = text + "\0" + json.dumps(stable, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _load_records(self, path: str) -> Dict[Tuple, Tuple[str, str, Dict[str, Any]]]:
+        """Load a file and return {key: (fingerprint, text, metadata)}"""
+        loader = JSONDataLoader(path)
+        rows = list(loader.iter_records(self.text_fields, self.metadata_fields, self.id_field))
+        keys = [self._record_key(metadata) for _, metadata in rows]
+        counts = Counter(keys)
+
+        records = {}
+        for key, (text, metadata) in zip(keys, rows):
+            if counts[key] > 1 and metadata.get("index") is not None:
+                key = key + (("index", metadata["index"]),)
+            if not key or key in records:
+                # Re-indexing by a repeated key would delete the other records' chunks
+                raise ValueError(f"Records in {path} cannot be keyed uniquely (repeated key {key})")
+            records[key] = (self._fingerprint(text, metadata), text, metadata)
+        return records
+
+    def snapshot(self):
+        """Record the current state of every file as already indexed"""
+        for path in self.json_files:
+            records = self._load_records(path)
+            self._snapshots[path] = {key: record[0] for key, record in records.items()}
+            self._mtimes[path] = os.stat(path).st_mtime
+        print(f"👀 Watching {len(self.json_files)} file(s) for changes")
+
+    def check_file(self, path: str) -> int:
+        """Diff one file against its snapshot and re-index changes; returns changed record count"""
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            return 0
+        if mtime == self._mtimes.get(path):
+            return 0
+
+        try:
+            records = self._load_records(path)
+        except ValueError as e:
+            # Invalid JSON (probably mid-write) or ambiguous keys; retried on the next change
+            print(f"⚠️  Skipping reload of {path}: {e}")
+            return 0
+
+        previous = self._snapshots.get(path, {})
+        changed = [key for key, record in records.items() if previous.get(key) != record[0]]
+        removed = [key for key in previous if key not in records]
+
+        if not changed and not removed:
+            self._mtimes[path] = mtime
+            return 0
+
+        store = ChunkStore()
+        for key in changed:
+            _, text, metadata = records[key]
+            store.add_document(text, metadata)
+
+        # Loader metadata uses the file path as given as the "source" value
+        keys = [dict(key) for key in changed + removed]
+        self.rag.vector_manager.replace_records(path, store, keys)
+
+        self._snapshots[path] = {key: record[0] for key, record in records.items()}
+        self._mtimes[path] = mtime
+        print(f"✅ Applied {len(changed)} changed and {len(removed)} removed records from {path}")
+        return len(changed) + len(removed)
+
+    def check_once(self) -> int:
+        """Check every watched file once"""
+        total = 0
+        for path in self.json_files:
+            try:
+                total += self.check_file(path)
+            except Exception as e:
+                print(f"❌ Failed to re-index {path}: {e}")
+        return total
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check_once()
+
+    def start(self):
+        """Start watching in a background thread"""
+        if not self._snapshots:
+            self.snapshot()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="json-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background watcher"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None